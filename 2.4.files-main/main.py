@@ -1,4 +1,199 @@
+import hashlib
+import json
+import mmap
+import os
 import pprint
+import shutil
+import time
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections.abc import Iterable, Iterator
+
+
+class RecipeParseError(ValueError):
+    """
+    Ошибка разбора файла с рецептами. Содержит номер строки, на которой она обнаружена.
+    """
+    def __init__(self, line_number: int, message: str):
+        super().__init__(f"Строка {line_number}: {message}")
+        self.line_number = line_number
+
+
+def parse_ingredient(line: str, line_number: int) -> dict:
+    """
+    Функция разбирает строку ингредиента вида “Название | Количество | Единица измерения”.
+    Пробелы вокруг частей игнорируются, количество может быть целым или дробным числом.
+    :param line: строка ингредиента
+    :param line_number: номер строки в файле для сообщения об ошибке
+    :return: словарь вида {'ingredient_name': 'Яйцо', 'quantity': 2, 'measure': 'шт.'}
+    """
+    parts = [part.strip() for part in line.split("|")]
+    if len(parts) != 3 or not all(parts):
+        raise RecipeParseError(line_number, f"ожидался ингредиент “Название | Количество | Единица”, получено “{line}”")
+    name, quantity, measure = parts
+    try:
+        quantity = int(quantity) if quantity.isdigit() else float(quantity.replace(",", "."))
+    except ValueError:
+        raise RecipeParseError(line_number, f"некорректное количество “{quantity}”") from None
+    return {"ingredient_name": name, "quantity": quantity, "measure": measure}
+
+
+def iter_recipe_blocks(f, line_number: int = 0) -> Iterator[tuple]:
+    """
+    Генератор разбирает рецепты из файла, открытого в двоичном режиме (или mmap), по одному блоку за раз.
+    Пустые строки и пробелы по краям строк между блоками пропускаются.
+    :param f: объект с методами readline() и tell(), возвращающий строки в байтах
+    :param line_number: номер строки, предшествующей текущей позиции (для сообщений об ошибках)
+    :return: генератор кортежей (смещение названия в байтах, название блюда, список ингредиентов)
+    """
+    while True:
+        offset = f.tell()
+        raw = f.readline()
+        if not raw:
+            return
+        line_number += 1
+        name = raw.decode("utf-8").strip()
+        if not name:
+            continue
+        raw = f.readline()
+        line_number += 1
+        count = raw.decode("utf-8").strip()
+        if not count.isdigit():
+            raise RecipeParseError(line_number, f"для блюда “{name}” ожидалось количество ингредиентов, получено “{count}”")
+        ingredients = []
+        for _ in range(int(count)):
+            raw = f.readline()
+            line_number += 1
+            if not raw:
+                raise RecipeParseError(line_number, f"файл закончился, у блюда “{name}” не хватает ингредиентов")
+            ingredients.append(parse_ingredient(raw.decode("utf-8").strip(), line_number))
+        yield offset, name, ingredients
+
+
+def iter_recipes(recipes: str) -> Iterator[tuple]:
+    """
+    Функция лениво читает файл с рецептами и отдает рецепты по одному, не загружая всю книгу в память.
+    При ошибке в формате выбрасывает RecipeParseError с номером строки.
+    :param recipes: путь до файла
+    :return: генератор кортежей (название блюда, список ингредиентов)
+    """
+    with open(recipes, "rb") as f:
+        for _, name, ingredients in iter_recipe_blocks(f):
+            yield name, ingredients
+
+
+def build_index(recipes: str, index_path: str = None) -> dict:
+    """
+    Функция строит индекс “название блюда -> смещение в байтах” за один проход по файлу
+    и сохраняет его в JSON вместе с размером и временем изменения файла рецептов.
+    :param recipes: путь до файла
+    :param index_path: путь до файла индекса (по умолчанию рядом с файлом рецептов, с расширением .idx)
+    :return: словарь вида {'Омлет': 0, 'Утка по-пекински': 52}
+    """
+    index = {}
+    with open(recipes, "rb") as f:
+        for offset, name, _ in iter_recipe_blocks(f):
+            index[name] = offset
+    stat = os.stat(recipes)
+    with open(index_path or recipes + ".idx", "w", encoding="utf-8") as f:
+        json.dump({"size": stat.st_size, "mtime": stat.st_mtime, "offsets": index}, f, ensure_ascii=False)
+    return index
+
+
+def load_index(recipes: str, index_path: str = None) -> dict:
+    """
+    Функция загружает индекс рецептов с диска. Если индекса нет или файл рецептов изменился
+    после его построения, индекс перестраивается.
+    :param recipes: путь до файла
+    :param index_path: путь до файла индекса (по умолчанию рядом с файлом рецептов, с расширением .idx)
+    :return: словарь “название блюда -> смещение в байтах”
+    """
+    stat = os.stat(recipes)
+    try:
+        with open(index_path or recipes + ".idx", "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data["size"] == stat.st_size and data["mtime"] == stat.st_mtime:
+            return data["offsets"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return build_index(recipes, index_path)
+
+
+def load_recipe(recipes: str, name: str, index: dict = None) -> list:
+    """
+    Функция загружает один рецепт по названию, не разбирая всю книгу:
+    находит смещение по индексу и читает только нужный блок из отображенного в память файла.
+    :param recipes: путь до файла
+    :param name: название блюда
+    :param index: индекс “название -> смещение” (по умолчанию загружается через load_index)
+    :return: список ингредиентов блюда
+    """
+    if index is None:
+        index = load_index(recipes)
+    if name not in index:
+        raise ValueError(f"Блюдо {name} отсутствует в книге рецептов")
+    with open(recipes, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        mm.seek(index[name])
+        for _, found, ingredients in iter_recipe_blocks(mm):
+            if found != name:
+                raise ValueError(f"Индекс устарел: по смещению {index[name]} найдено блюдо {found}")
+            return ingredients
+
+
+class UnitRegistry:
+    """
+    Класс UnitRegistry - справочник единиц измерения.
+    Приводит записи единиц к каноническому виду (регистр, пробелы, точка в конце, синонимы)
+    и хранит для каждой базовую единицу и множитель перевода в неё (л -> мл * 1000, кг -> г * 1000).
+    Единицы разных величин (масса, объем, штуки, ложки) между собой не пересчитываются.
+    Неизвестная единица считается базовой сама для себя. Поэтому “ст.” (стакан) не сливается со “ст.л”.
+    """
+    UNITS = {
+        "г": ("г", 1), "кг": ("г", 1000), "мг": ("г", 0.001),
+        "мл": ("мл", 1), "л": ("мл", 1000),
+        "шт": ("шт", 1), "ст.л": ("ст.л", 1), "ч.л": ("ч.л", 1), "зубч": ("зубч", 1),
+    }
+    ALIASES = {
+        "гр": "г", "грамм": "г", "килограмм": "кг", "литр": "л", "миллилитр": "мл",
+        "штук": "шт", "штука": "шт", "стл": "ст.л", "чл": "ч.л", "зубчик": "зубч",
+    }
+
+    def __init__(self, units: dict = None, aliases: dict = None):
+        self.units = dict(self.UNITS)
+        self.units.update(units or {})
+        self.aliases = dict(self.ALIASES)
+        self.aliases.update(aliases or {})
+        self.cache = {}
+
+    def canonical(self, unit: str) -> str:
+        """
+        Функция возвращает каноническую запись единицы измерения: “шт.” -> “шт”, “Ст. л.” -> “ст.л”.
+        :param unit: единица измерения в том виде, как она записана в рецепте
+        :return: каноническая единица измерения
+        """
+        name = unit.strip().lower().replace(" ", "")
+        if name not in self.units:
+            name = self.aliases.get(name, name)
+        if name not in self.units and name.endswith("."):
+            name = self.aliases.get(name[:-1], name[:-1])
+        return name
+
+    def base(self, unit: str) -> tuple:
+        """
+        Функция возвращает базовую единицу и множитель перевода в неё. Результат кешируется,
+        поэтому для каждой записи единицы разбор строки выполняется один раз.
+        :param unit: единица измерения в том виде, как она записана в рецепте
+        :return: кортеж (базовая единица, множитель)
+        """
+        result = self.cache.get(unit)
+        if result is None:
+            name = self.canonical(unit)
+            result = self.cache[unit] = self.units.get(name, (name, 1))
+        return result
+
+
+units = UnitRegistry()
 
 
 def get_dict(recipes: str) -> dict:
@@ -14,26 +209,20 @@ def get_dict(recipes: str) -> dict:
     ],
     }
     """
-    dict_rep = {}
-    with open(recipes, "r", encoding="utf-8") as f:
-        while True:
-            name = f.readline().strip()
-            if name == "":
-                break
-            count = int(f.readline().strip())
-            dict_rep[name] = []
-            for i in range(count):
-                ing, count, unit = f.readline().strip().split(" | ")
-                dict_rep[name].append({"ingredient_name": ing, "quantity": int(count), "measure": unit})
-            f.readline()
-    return dict_rep
+    return dict(iter_recipes(recipes))
 
 
-def get_shop_list_by_dishes(dishes: list, person_count: int) -> dict:
+def get_shop_list_by_dishes(dishes: list, person_count: int, book: "RecipeBook" = None) -> dict:
     """
     Функция принимает на вход список блюд и количество человек, возвращает словарь необходимых ингредиентов.
+    Количества суммируются в базовых единицах справочника units (100 мл и 1 л молока дают 1100 мл,
+    “шт” и “шт.” считаются одной единицей), итог выводится в единице, встреченной первой.
+    Если ингредиент указан в несовместимых единицах (например, в граммах и в штуках),
+    для второй величины заводится отдельная запись “Название (единица)”.
     :param dishes: список блюд
     :param person_count: количество человек
+    :param book: (необязательно) книга рецептов RecipeBook; если передана, список берется из её кэша,
+    иначе считается по глобальному словарю cook_book (заполняется в main)
     :return: словарь необходимых ингредиентов
     """
     if not isinstance(dishes, list) and not isinstance(person_count, int):
@@ -42,35 +231,744 @@ def get_shop_list_by_dishes(dishes: list, person_count: int) -> dict:
         raise ValueError("Количество человек должно быть больше нуля")
     if not dishes:
         raise ValueError("Список блюд не может быть пустым")
-    shop_list = {}
+    if book is not None:
+        return book.get_shop_list(dishes, person_count)
+    totals = {}
     for dish in dishes:
         if dish in cook_book:
             for ing in cook_book[dish]:
-                if ing["ingredient_name"] not in shop_list:
-                    shop_list[ing["ingredient_name"]] = {"measure": ing["measure"], "quantity": ing["quantity"] * person_count}
-                else:
-                    shop_list[ing["ingredient_name"]]["quantity"] += ing["quantity"] * person_count
+                base, factor = units.base(ing["measure"])
+                key = (ing["ingredient_name"], base)
+                if key not in totals:
+                    totals[key] = [ing["measure"], factor, 0]
+                totals[key][2] += ing["quantity"] * factor * person_count
         else:
             raise ValueError(f"Блюдо {dish} отсутствует в книге рецептов")
+    shop_list = {}
+    for (name, base), (measure, factor, quantity) in totals.items():
+        if name in shop_list:
+            name = f"{name} ({base})"
+        quantity = round(quantity / factor, 6)
+        shop_list[name] = {"measure": measure, "quantity": int(quantity) if quantity == int(quantity) else quantity}
     return shop_list
 
 
-cook_book = get_dict('recipes.txt')
-# print(cook_book)
-# pprint.pprint(cook_book)
+class CookBook:
+    """
+    Класс CookBook - компактное хранение книги рецептов.
+    Названия блюд, ингредиентов и единиц измерения хранятся один раз и заменяются целочисленными id,
+    а строки рецептов лежат в колонках array (id ингредиента, количество, id единицы измерения).
+    Строки одного блюда идут подряд: для каждого блюда хранятся начало и длина его диапазона.
+    При загрузке количества сразу переводятся в базовые единицы справочника UnitRegistry
+    (колонки item_col и base_quantity_col), поэтому при подсчете списков покупок строки единиц не разбираются.
+    Позиция (item) - пара “ингредиент, базовая единица”. В списке покупок, как и в get_shop_list_by_dishes,
+    позиция выводится в единице, встреченной первой в заказе, а если ингредиент в этом списке уже есть
+    в другой величине - под названием “Название (базовая единица)”.
+    Обратный индекс postings (позиция -> {id блюда: количество в базовой единице}) обновляется
+    при каждом добавлении рецепта и позволяет искать блюда по ингредиентам (dishes_with, can_cook);
+    позиции ингредиента находятся по словарю ingredient_items (id ингредиента -> [id позиций]).
+    Для совместимости есть представление в виде словаря, как у get_dict (метод as_dict и доступ по названию).
+    """
+    def __init__(self, registry: UnitRegistry = None):
+        self.registry = registry or units
+        self.dish_names = []
+        self.dish_ids = {}
+        self.ingredient_names = []
+        self.ingredient_ids = {}
+        self.unit_names = []
+        self.unit_ids = {}
+        self.unit_base = []
+        self.unit_factor = array("d")
+        self.item_names = []
+        self.item_ids = {}
+        self.item_unit = array("I")
+        self.ingredient_items = {}
+        self.postings = []
+        self.dish_start = array("I")
+        self.dish_length = array("I")
+        self.dish_items = array("I")
+        self.ingredient_col = array("I")
+        self.quantity_col = array("d")
+        self.unit_col = array("I")
+        self.item_col = array("I")
+        self.base_quantity_col = array("d")
+
+    @classmethod
+    def from_file(cls, recipes: str, registry: UnitRegistry = None) -> "CookBook":
+        """
+        Создает книгу рецептов из файла, разбирая его потоково через iter_recipes.
+        :param recipes: путь до файла
+        :param registry: справочник единиц (по умолчанию units)
+        :return: экземпляр CookBook
+        """
+        book = cls(registry)
+        for name, ingredients in iter_recipes(recipes):
+            book.add_recipe(name, ingredients)
+        return book
+
+    @classmethod
+    def from_dict(cls, cook_book: dict, registry: UnitRegistry = None) -> "CookBook":
+        """
+        Создает книгу рецептов из словаря в формате get_dict.
+        :param cook_book: словарь с рецептами
+        :param registry: справочник единиц (по умолчанию units)
+        :return: экземпляр CookBook
+        """
+        book = cls(registry)
+        for name, ingredients in cook_book.items():
+            book.add_recipe(name, ingredients)
+        return book
+
+    @staticmethod
+    def intern(value: str, names: list, ids: dict) -> int:
+        """
+        Возвращает id строки, добавляя её в справочник при первом появлении.
+        :param value: строка
+        :param names: список строк по id
+        :param ids: словарь “строка -> id”
+        :return: id строки
+        """
+        key = ids.get(value)
+        if key is None:
+            key = ids[value] = len(names)
+            names.append(value)
+        return key
 
-shop_list = get_shop_list_by_dishes(['Запеченный картофель', 'Омлет'], 2)
-# pprint.pprint(shop_list)
+    def add_recipe(self, name: str, ingredients: Iterable[dict]) -> int:
+        """
+        Добавляет рецепт в книгу. Если блюдо уже есть, рецепт заменяется (как при повторе блюда в get_dict).
+        :param name: название блюда
+        :param ingredients: ингредиенты в формате get_dict
+        :return: id блюда
+        """
+        start = len(self.ingredient_col)
+        for ing in ingredients:
+            ingredient_id = self.intern(ing["ingredient_name"], self.ingredient_names, self.ingredient_ids)
+            unit_id = self.intern(ing["measure"], self.unit_names, self.unit_ids)
+            if unit_id == len(self.unit_base):
+                base, factor = self.registry.base(ing["measure"])
+                self.unit_base.append(base)
+                self.unit_factor.append(factor)
+            self.ingredient_col.append(ingredient_id)
+            self.quantity_col.append(ing["quantity"])
+            self.unit_col.append(unit_id)
+            self.item_col.append(self.item_id(ingredient_id, unit_id))
+            self.base_quantity_col.append(ing["quantity"] * self.unit_factor[unit_id])
+        length = len(self.ingredient_col) - start
+        dish_id = self.dish_ids.get(name)
+        if dish_id is None:
+            dish_id = self.intern(name, self.dish_names, self.dish_ids)
+            self.dish_start.append(start)
+            self.dish_length.append(length)
+            self.dish_items.append(0)
+        else:
+            for row in self.rows(name):
+                self.postings[self.item_col[row]].pop(dish_id, None)
+            self.dish_start[dish_id] = start
+            self.dish_length[dish_id] = length
+        needs = {}
+        for row in range(start, start + length):
+            needs[self.item_col[row]] = needs.get(self.item_col[row], 0) + self.base_quantity_col[row]
+        for item_id, quantity in needs.items():
+            self.postings[item_id][dish_id] = quantity
+        self.dish_items[dish_id] = len(needs)
+        return dish_id
+
+    def item_id(self, ingredient_id: int, unit_id: int) -> int:
+        """
+        Возвращает id позиции “ингредиент, базовая единица”, создавая её при первом появлении.
+        Позиция называется как ингредиент; суффикс с базовой единицей добавляется при выводе (shop_list_view).
+        :param ingredient_id: id ингредиента
+        :param unit_id: id единицы измерения в записи рецепта
+        :return: id позиции
+        """
+        key = (ingredient_id, self.unit_base[unit_id])
+        item_id = self.item_ids.get(key)
+        if item_id is None:
+            item_id = self.intern(key, self.item_names, self.item_ids)
+            self.item_names[item_id] = self.ingredient_names[ingredient_id]
+            self.item_unit.append(unit_id)
+            self.ingredient_items.setdefault(ingredient_id, []).append(item_id)
+            self.postings.append({})
+        return item_id
+
+    def rows(self, name: str) -> range:
+        """
+        Возвращает диапазон строк колонок, относящихся к блюду.
+        :param name: название блюда
+        :return: диапазон индексов строк
+        """
+        if name not in self.dish_ids:
+            raise ValueError(f"Блюдо {name} отсутствует в книге рецептов")
+        dish_id = self.dish_ids[name]
+        start = self.dish_start[dish_id]
+        return range(start, start + self.dish_length[dish_id])
+
+    def dishes_with(self, ingredient: str) -> dict:
+        """
+        Возвращает блюда, в которых используется ингредиент, по обратному индексу.
+        :param ingredient: название ингредиента
+        :return: словарь вида {'Омлет': [{'measure': 'шт', 'quantity': 2}]}
+        (несколько записей, если ингредиент указан в блюде в несовместимых единицах)
+        """
+        result = {}
+        for item_id in self.ingredient_items.get(self.ingredient_ids.get(ingredient), ()):
+            unit_id = self.item_unit[item_id]
+            for dish_id, quantity in self.postings[item_id].items():
+                quantity = round(quantity / self.unit_factor[unit_id], 6)
+                result.setdefault(self.dish_names[dish_id], []).append({
+                    "measure": self.unit_names[unit_id],
+                    "quantity": int(quantity) if quantity.is_integer() else quantity,
+                })
+        return result
+
+    def can_cook(self, pantry: dict, person_count: int = 1) -> list:
+        """
+        Возвращает блюда, которые можно приготовить из продуктов в наличии на person_count человек.
+        Перебираются только блюда из обратного индекса продуктов кладовой: для каждого блюда считается,
+        сколько его позиций покрыто запасами, и блюдо подходит, если покрыты все.
+        Время работы пропорционально размеру кладовой и числу использующих её продуктов блюд,
+        а не размеру всей книги.
+        :param pantry: продукты в наличии в формате списка покупок:
+        {'Яйцо': {'measure': 'шт', 'quantity': 10}, 'Молоко': {'measure': 'л', 'quantity': 1}}
+        :param person_count: (по умолчанию 1) количество человек
+        :return: список названий блюд
+        """
+        if person_count <= 0:
+            raise ValueError("Количество человек должно быть больше нуля")
+        covered = {}
+        for name, stock in pantry.items():
+            ingredient_id = self.ingredient_ids.get(name)
+            if ingredient_id is None:
+                continue
+            base, factor = self.registry.base(stock["measure"])
+            item_id = self.item_ids.get((ingredient_id, base))
+            if item_id is None:
+                continue
+            available = stock["quantity"] * factor
+            for dish_id, quantity in self.postings[item_id].items():
+                if quantity * person_count <= available:
+                    covered[dish_id] = covered.get(dish_id, 0) + 1
+        return [self.dish_names[dish_id] for dish_id, count in covered.items() if count == self.dish_items[dish_id]]
+
+    def __len__(self) -> int:
+        return len(self.dish_names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.dish_ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.dish_names)
 
-# shop_list_2 = get_shop_list_by_dishes(['Омлет', 'Фахитос'], 3)
-# pprint.pprint(shop_list_2)
+    def __getitem__(self, name: str) -> list:
+        if name not in self.dish_ids:
+            raise KeyError(name)
+        return [
+            {
+                "ingredient_name": self.ingredient_names[self.ingredient_col[row]],
+                "quantity": self.number(self.quantity_col[row]),
+                "measure": self.unit_names[self.unit_col[row]],
+            }
+            for row in self.rows(name)
+        ]
 
+    @staticmethod
+    def number(value: float):
+        """
+        Возвращает целое число, если значение целое, иначе само значение.
+        """
+        return int(value) if value.is_integer() else value
 
-def get_sorted_file(files: list) -> str:
+    def as_dict(self) -> dict:
+        """
+        Функция возвращает книгу рецептов в формате get_dict.
+        :return: словарь с рецептами
+        """
+        return {name: self[name] for name in self.dish_names}
+
+    def get_shop_list(self, dishes, person_count: int = 1) -> dict:
+        """
+        Аналог get_shop_list_by_dishes для компактной книги, считается через get_shop_lists.
+        :param dishes: список блюд или словарь “блюдо -> множитель порций”
+        :param person_count: количество человек
+        :return: словарь необходимых ингредиентов
+        """
+        return self.get_shop_lists([dishes], person_count)[0]
+
+    def get_shop_lists(self, orders: Iterable, person_count: int = 1, combined: bool = False):
+        """
+        Пакетный расчет списков покупок для множества заказов за один вызов.
+        Книга хранится как разреженная матрица “блюдо x ингредиент” (строки блюда идут подряд в колонках),
+        заказ - как вектор порций по блюдам, список покупок - их произведение.
+        Колонки каждого блюда извлекаются срезом array один раз на весь пакет,
+        суммирование идет по id позиций в базовых единицах без работы со строками;
+        названия подставляются в конце, количество выводится в единице, встреченной в заказе первой.
+        :param orders: заказы; каждый - список блюд (повтор блюда = ещё одна порция)
+        или словарь “блюдо -> множитель порций”
+        :param person_count: (по умолчанию 1) общий множитель для всех заказов
+        :param combined: (по умолчанию False) вернуть один общий список покупок по всем заказам
+        :return: список словарей необходимых ингредиентов по каждому заказу или один словарь при combined
+        """
+        if not isinstance(person_count, (int, float)) or person_count <= 0:
+            raise ValueError("Количество человек должно быть больше нуля")
+        columns = {}
+        results = []
+        total = {}
+        total_units = {}
+        for order in orders:
+            totals = total if combined else {}
+            units = total_units if combined else {}
+            for dish, servings in self.order_servings(order, person_count).items():
+                column = columns.get(dish)
+                if column is None:
+                    rows = self.rows(dish)
+                    column = columns[dish] = tuple(zip(self.item_col[rows.start:rows.stop].tolist(),
+                                                       self.base_quantity_col[rows.start:rows.stop].tolist(),
+                                                       self.unit_col[rows.start:rows.stop].tolist()))
+                for item_id, quantity, unit_id in column:
+                    if item_id in totals:
+                        totals[item_id] += quantity * servings
+                    else:
+                        totals[item_id] = quantity * servings
+                        units[item_id] = unit_id
+            if not combined:
+                results.append(self.shop_list_view(totals, units))
+        return self.shop_list_view(total, total_units) if combined else results
+
+    @staticmethod
+    def order_servings(order, person_count: int) -> dict:
+        """
+        Приводит заказ к вектору порций “блюдо -> количество порций”.
+        :param order: список блюд или словарь “блюдо -> множитель порций”
+        :param person_count: общий множитель
+        :return: словарь “блюдо -> количество порций”
+        """
+        if not order:
+            raise ValueError("Список блюд не может быть пустым")
+        if isinstance(order, dict):
+            for dish, multiplier in order.items():
+                if not isinstance(multiplier, (int, float)) or multiplier <= 0:
+                    raise ValueError(f"Множитель порций для блюда {dish} должен быть больше нуля")
+            return {dish: multiplier * person_count for dish, multiplier in order.items()}
+        if not isinstance(order, (list, tuple)):
+            raise TypeError("Неверный тип данных")
+        servings = {}
+        for dish in order:
+            servings[dish] = servings.get(dish, 0) + person_count
+        return servings
+
+    def shop_list_view(self, totals: dict, units: dict = None) -> dict:
+        """
+        Преобразует суммы по id позиций (в базовых единицах) в словарь формата get_shop_list_by_dishes.
+        Правила те же, что в get_shop_list_by_dishes: позиции идут в порядке первого появления,
+        если ингредиент уже есть в списке, к названию добавляется базовая единица в скобках.
+        :param totals: словарь “id позиции -> количество в базовой единице”
+        :param units: (необязательно) единица вывода для позиций “id позиции -> id единицы”,
+        по умолчанию единица, встреченная первой в книге
+        :return: словарь необходимых ингредиентов
+        """
+        shop_list = {}
+        for item_id, total in totals.items():
+            unit_id = self.item_unit[item_id] if units is None else units[item_id]
+            quantity = round(total / self.unit_factor[unit_id], 6)
+            name = self.item_names[item_id]
+            if name in shop_list:
+                name = f"{name} ({self.unit_base[unit_id]})"
+            shop_list[name] = {
+                "measure": self.unit_names[unit_id],
+                "quantity": int(quantity) if quantity.is_integer() else quantity,
+            }
+        return shop_list
+
+
+class RecipeBook:
+    """
+    Класс RecipeBook - книга рецептов, которая сама владеет своими данными и кэширует списки покупок.
+    Рецепты читаются из файла через get_dict и хранятся в словаре recipes и в компактной книге CookBook.
+    Перед каждым запросом проверяются размер и время изменения файла; если они поменялись, сверяется
+    sha256 содержимого, и при новом содержимом файл разбирается заново, а кэш очищается.
+    Кэш списков покупок - LRU (OrderedDict) с ограничениями по размеру и времени жизни записей.
+    Ключ - нормализованный набор блюд (блюдо -> количество повторов, без учета порядка) и количество человек.
+    """
+    def __init__(self, recipes: str, maxsize: int = 256, ttl: float = 300, registry: UnitRegistry = None):
+        """
+        :param recipes: путь до файла с рецептами
+        :param maxsize: (по умолчанию 256) максимальное количество списков в кэше
+        :param ttl: (по умолчанию 300) время жизни записи кэша в секундах, None - без ограничения
+        :param registry: справочник единиц (по умолчанию units)
+        """
+        if maxsize <= 0:
+            raise ValueError("Размер кэша должен быть больше нуля")
+        self.path = recipes
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.registry = registry
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.stat = None
+        self.digest = None
+        self.recipes = {}
+        self.book = None
+        self.reload()
+
+    @staticmethod
+    def file_digest(recipes: str) -> str:
+        """
+        Считает sha256 содержимого файла блоками.
+        :param recipes: путь до файла
+        :return: шестнадцатеричная строка хэша
+        """
+        digest = hashlib.sha256()
+        with open(recipes, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def reload(self) -> None:
+        """
+        Разбирает файл рецептов заново и очищает кэш списков покупок.
+        """
+        stat = os.stat(self.path)
+        self.digest = self.file_digest(self.path)
+        self.recipes = get_dict(self.path)
+        self.book = CookBook.from_dict(self.recipes, self.registry)
+        self.stat = (stat.st_size, stat.st_mtime_ns)
+        self.cache.clear()
+        self.reloads += 1
+
+    def refresh(self) -> bool:
+        """
+        Проверяет, изменился ли файл рецептов, и при необходимости перечитывает его.
+        Если изменилось только время изменения, а содержимое то же, кэш сохраняется.
+        :return: True, если книга была перечитана
+        """
+        stat = os.stat(self.path)
+        if (stat.st_size, stat.st_mtime_ns) == self.stat:
+            return False
+        if stat.st_size == self.stat[0] and self.file_digest(self.path) == self.digest:
+            self.stat = (stat.st_size, stat.st_mtime_ns)
+            return False
+        self.reload()
+        return True
+
+    @staticmethod
+    def cache_key(dishes: list, person_count: int) -> tuple:
+        """
+        Нормализует запрос: порядок блюд не важен, повторы учитываются.
+        :param dishes: список блюд
+        :param person_count: количество человек
+        :return: ключ кэша
+        """
+        counts = {}
+        for dish in dishes:
+            counts[dish] = counts.get(dish, 0) + 1
+        return tuple(sorted(counts.items())), person_count
+
+    def get_shop_list(self, dishes: list, person_count: int) -> dict:
+        """
+        Возвращает список покупок, при повторном запросе того же набора блюд - из кэша.
+        :param dishes: список блюд
+        :param person_count: количество человек
+        :return: словарь необходимых ингредиентов (копия, её можно изменять)
+        """
+        if not isinstance(dishes, (list, tuple)) or not isinstance(person_count, int):
+            raise TypeError("Неверный тип данных")
+        key = self.cache_key(dishes, person_count)
+        self.refresh()
+        now = time.monotonic()
+        entry = self.cache.get(key)
+        if entry is not None and (self.ttl is None or now - entry[0] < self.ttl):
+            self.cache.move_to_end(key)
+            self.hits += 1
+            shop_list = entry[1]
+        else:
+            self.misses += 1
+            shop_list = self.book.get_shop_list(list(dishes), person_count)
+            self.cache[key] = (now, shop_list)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        return {name: dict(item) for name, item in shop_list.items()}
+
+    def cache_info(self) -> dict:
+        """
+        Статистика кэша.
+        :return: словарь с количеством попаданий, промахов, записей и перечитываний файла
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": len(self.cache),
+            "maxsize": self.maxsize,
+            "reloads": self.reloads,
+        }
+
+    def cache_clear(self) -> None:
+        """
+        Очищает кэш и статистику попаданий.
+        """
+        self.cache.clear()
+        self.hits = self.misses = 0
+
+
+# Книга рецептов для get_shop_list_by_dishes, заполняется в main (или cook_book.update(get_dict(...)))
+cook_book = {}
+
+
+def count_lines(file: str, chunk_size: int = 1024 * 1024) -> int:
+    """
+    Функция считает строки файла за один проход, читая его блоками в двоичном режиме.
+    Последняя строка без завершающего перевода строки тоже учитывается, как у readlines.
+    :param file: путь до файла
+    :param chunk_size: (по умолчанию 1 МБ) размер блока чтения
+    :return: количество строк
+    """
+    count = 0
+    last = b"\n"
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            count += chunk.count(b"\n")
+            last = chunk[-1:]
+    return count if last == b"\n" else count + 1
+
+
+def copy_stream(src, dst) -> None:
+    """
+    Функция копирует остаток файла src в конец файла dst средствами ядра
+    (os.copy_file_range или os.sendfile), а если они недоступны - блоками через shutil.copyfileobj.
+    :param src: исходный файл, открытый на чтение в двоичном режиме
+    :param dst: файл результата, открытый на запись в двоичном режиме без буферизации
+    """
+    size = os.fstat(src.fileno()).st_size - src.tell()
+    for copy in (getattr(os, "copy_file_range", None), getattr(os, "sendfile", None)):
+        if copy is None:
+            continue
+        try:
+            while size > 0:
+                if copy is os.sendfile:
+                    sent = copy(dst.fileno(), src.fileno(), None, min(size, 1 << 30))
+                else:
+                    sent = copy(src.fileno(), dst.fileno(), min(size, 1 << 30))
+                if not sent:
+                    break
+                size -= sent
+            return
+        except OSError:
+            continue
+    shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+def get_sorted_file_stream(files: list, file_result: str = "result.txt", workers: int = 8) -> str:
+    """
+    Потоковый вариант get_sorted_file для больших файлов: память не зависит от их размера.
+    Строки каждого файла считаются за один проход (count_lines), файлы обрабатываются параллельно в потоках.
+    Затем файлы упорядочиваются по количеству строк и по очереди копируются в результат целиком, без разбора на строки.
+    В отличие от get_sorted_file, строки копируются байт в байт, без удаления пробелов по краям;
+    если файл не заканчивается переводом строки, он дописывается.
+    :param files: списки с названием файлов для сортировки и объединения
+    :param file_result: (по умолчанию result.txt) путь до файла результата
+    :param workers: (по умолчанию 8) количество потоков для подсчета строк
+    :return: путь до созданного файла
+    """
+    if not isinstance(files, list):
+        raise TypeError("Неверный тип данных")
+    if not files:
+        raise ValueError("Список файлов не может быть пустым")
+    with ThreadPoolExecutor(max_workers=min(workers, len(files))) as executor:
+        counts = list(executor.map(count_lines, files))
+    order = sorted(zip(counts, files), key=lambda x: x[0])
+    with open(file_result, "wb", buffering=0) as f:
+        for count, file in order:
+            f.write(f"{file}\n{count}\n".encode("utf-8"))
+            with open(file, "rb") as f2:
+                copy_stream(f2, f)
+                if count:
+                    f2.seek(-1, os.SEEK_END)
+                    if f2.read(1) != b"\n":
+                        f.write(b"\n")
+    return file_result
+
+
+def count_range(file: str, start: int, stop: int, final: bool, chunk_size: int = 1024 * 1024) -> int:
+    """
+    Функция считает переводы строки в диапазоне байтов [start, stop) файла.
+    Для последнего диапазона файла незавершенная последняя строка тоже учитывается.
+    Объявлена на уровне модуля, чтобы её можно было передать в пул процессов.
+    :param file: путь до файла
+    :param start: начало диапазона
+    :param stop: конец диапазона
+    :param final: диапазон последний в файле
+    :param chunk_size: (по умолчанию 1 МБ) размер блока чтения
+    :return: количество строк в диапазоне
+    """
+    count = 0
+    last = b"\n"
+    with open(file, "rb") as f:
+        f.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            count += chunk.count(b"\n")
+            last = chunk[-1:]
+            remaining -= len(chunk)
+    return count if not final or last == b"\n" else count + 1
+
+
+def write_range(file: str, start: int, stop: int, newline: bool, file_result: str, offset: int,
+                header: bytes = b"") -> int:
+    """
+    Функция записывает блок результата прямо в заранее созданный файл результата, начиная с позиции offset:
+    служебный заголовок (для первого диапазона файла), байты [start, stop) файла
+    и, если нужно, недостающий перевод строки. Байты копируются средствами ядра (os.copy_file_range),
+    а если это недоступно - блоками через позиционированную запись.
+    Объявлена на уровне модуля, чтобы её можно было передать в пул процессов.
+    :param file: путь до файла
+    :param start: начало диапазона
+    :param stop: конец диапазона
+    :param newline: дописать перевод строки после диапазона
+    :param file_result: путь до файла результата
+    :param offset: позиция блока в файле результата
+    :param header: заголовок “имя файла, количество строк”
+    :return: количество записанных байтов
+    """
+    position = start
+    with open(file, "rb") as src, open(file_result, "r+b", buffering=0) as dst:
+        dst.seek(offset)
+        dst.write(header)
+        offset += len(header)
+        copy = getattr(os, "copy_file_range", None)
+        if copy is not None:
+            try:
+                while position < stop:
+                    sent = copy(src.fileno(), dst.fileno(), min(stop - position, 1 << 30), position, offset)
+                    if not sent:
+                        break
+                    position += sent
+                    offset += sent
+            except OSError:
+                pass
+        src.seek(position)
+        dst.seek(offset)
+        while position < stop:
+            chunk = src.read(min(1024 * 1024, stop - position))
+            if not chunk:
+                break
+            dst.write(chunk)
+            position += len(chunk)
+        if newline:
+            dst.write(b"\n")
+    return len(header) + position - start + newline
+
+
+def file_ranges(files: list, range_size: int) -> Iterator[tuple]:
+    """
+    Генератор делит файлы на диапазоны байтов не больше range_size.
+    У пустого файла один пустой диапазон.
+    :param files: список файлов
+    :param range_size: максимальный размер диапазона
+    :return: кортежи (номер файла, файл, начало, конец, последний ли диапазон)
+    """
+    for number, file in enumerate(files):
+        size = os.path.getsize(file)
+        start = 0
+        while True:
+            stop = min(size, start + range_size)
+            yield number, file, start, stop, stop == size
+            if stop == size:
+                break
+            start = stop
+
+
+def ordered_map(executor, fn, tasks: Iterable[tuple], window: int) -> Iterator:
+    """
+    Генератор выполняет fn(*task) в пуле и отдает результаты в порядке задач.
+    Одновременно в работе не больше window задач, поэтому готовые, но еще не записанные блоки
+    не накапливаются в памяти.
+    :param executor: пул потоков или процессов
+    :param fn: функция
+    :param tasks: аргументы вызовов
+    :param window: количество задач, отправляемых в пул заранее
+    :return: результаты fn по порядку
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(fn, *task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def get_sorted_file_parallel(files: list, file_result: str = "result.txt", pool: str = "process",
+                             workers: int = None, range_size: int = 64 * 1024 * 1024, window: int = None) -> str:
+    """
+    Параллельный вариант get_sorted_file_stream для многоядерных машин и быстрых дисков.
+    Файлы делятся на диапазоны байтов (file_ranges), и переводы строк в диапазонах считаются в пуле (count_range).
+    Затем по порядку сортировки вычисляются позиции блоков результата - заголовка и тела файла по диапазонам,
+    файл результата создается сразу нужного размера, и задачи пула записывают блоки прямо в него (write_range).
+    Между процессами передаются только параметры диапазонов и количества байтов, а не содержимое файлов.
+    :param files: списки с названием файлов для сортировки и объединения
+    :param file_result: (по умолчанию result.txt) путь до файла результата
+    :param pool: (по умолчанию process) пул процессов (process) или потоков (thread)
+    :param workers: (по умолчанию - по числу ядер) размер пула
+    :param range_size: (по умолчанию 64 МБ) максимальный размер диапазона байтов одной задачи
+    :param window: (по умолчанию удвоенный размер пула) количество задач, отправляемых в пул заранее
+    :return: путь до созданного файла
+    """
+    if not isinstance(files, list):
+        raise TypeError("Неверный тип данных")
+    if not files:
+        raise ValueError("Список файлов не может быть пустым")
+    if pool not in ("process", "thread"):
+        raise ValueError("Пул должен быть process или thread")
+    workers = workers or os.cpu_count() or 1
+    window = window or 2 * workers
+    executor_class = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        ranges = list(file_ranges(files, range_size))
+        counts = [0] * len(files)
+        tasks = ((file, start, stop, final) for _, file, start, stop, final in ranges)
+        for (number, *_), count in zip(ranges, ordered_map(executor, count_range, tasks, window)):
+            counts[number] += count
+        order = sorted(range(len(files)), key=lambda number: counts[number])
+        by_file = {}
+        newline = [False] * len(files)
+        for number, file, start, stop, final in ranges:
+            by_file.setdefault(number, []).append((file, start, stop, final))
+            if final and stop:
+                with open(file, "rb") as f:
+                    f.seek(stop - 1)
+                    newline[number] = f.read(1) != b"\n"
+        tasks = []
+        offset = 0
+        for number in order:
+            for file, start, stop, final in by_file[number]:
+                header = f"{file}\n{counts[number]}\n".encode("utf-8") if not start else b""
+                tail = final and newline[number]
+                tasks.append((file, start, stop, tail, file_result, offset, header))
+                offset += len(header) + stop - start + tail
+        with open(file_result, "wb") as f:
+            f.truncate(offset)
+        for _ in ordered_map(executor, write_range, tasks, window):
+            pass
+    return file_result
+
+
+def get_sorted_file(files: list, stream: bool = False, pool: str = None) -> str:
     """
     Функция принимает на вход список файлов,
     возвращает содержимое всех файлов в одном файле отсортированном по количеству строк.
     :param files: списки с названием файлов для сортировки и объединения
+    :param stream: (по умолчанию False) потоковый режим get_sorted_file_stream для больших файлов,
+    тогда возвращается путь до созданного файла, а не его содержимое
+    :param pool: (по умолчанию None) в потоковом режиме - пул process или thread для get_sorted_file_parallel;
+    без stream=True указывать нельзя
     :return: строки из созданного файла. Содержимое файла предваряется служебной информацией на 2-х строках:
      имя файла и количество строк в нем.
     """
@@ -78,6 +976,12 @@ def get_sorted_file(files: list) -> str:
         raise TypeError("Неверный тип данных")
     if not files:
         raise ValueError("Список файлов не может быть пустым")
+    if pool and not stream:
+        raise ValueError("Пул используется только в потоковом режиме (stream=True)")
+    if stream and pool:
+        return get_sorted_file_parallel(files, pool=pool)
+    if stream:
+        return get_sorted_file_stream(files)
     file_result = 'result.txt'
     new_file = open(file_result, "w", encoding="utf-8")
     new_file.close()
@@ -94,6 +998,24 @@ def get_sorted_file(files: list) -> str:
     with open(file_result, "r", encoding="utf-8") as f:
         return f.read()
 
-get_sorted_file(['1.txt', '2.txt', '3.txt'])
-# print(get_sorted_file(['1.txt', '2.txt', '3.txt']))
 
+def main() -> None:
+    """
+    Демонстрация: читает книгу рецептов, считает список покупок и объединяет файлы 1.txt, 2.txt, 3.txt
+    """
+    cook_book.update(get_dict('recipes.txt'))
+    # print(cook_book)
+    # pprint.pprint(cook_book)
+
+    shop_list = get_shop_list_by_dishes(['Запеченный картофель', 'Омлет'], 2)
+    # pprint.pprint(shop_list)
+
+    # shop_list_2 = get_shop_list_by_dishes(['Омлет', 'Фахитос'], 3)
+    # pprint.pprint(shop_list_2)
+
+    get_sorted_file(['1.txt', '2.txt', '3.txt'])
+    # print(get_sorted_file(['1.txt', '2.txt', '3.txt']))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import argparse
+import importlib.util
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODULES = {
+    "oop": os.path.join(HERE, "oop_1_-main", "main.py"),
+    "files": os.path.join(HERE, "2.4.files-main", "main.py"),
+    "diplom": os.path.join(HERE, "py-diplom-basic-main", "main.py"),
+}
+SCALES = {
+    "small": {"students": 200, "lecturers": 20, "courses": 10, "grades": 20_000,
+              "dishes": 500, "ingredients": 8, "orders": 200, "files": 20, "lines": 2_000},
+    "medium": {"students": 2_000, "lecturers": 100, "courses": 30, "grades": 200_000,
+               "dishes": 5_000, "ingredients": 10, "orders": 1_000, "files": 100, "lines": 10_000},
+    "large": {"students": 20_000, "lecturers": 500, "courses": 100, "grades": 2_000_000,
+              "dishes": 50_000, "ingredients": 12, "orders": 5_000, "files": 500, "lines": 50_000},
+}
+UNITS = ["шт", "шт.", "г", "кг", "мл", "л", "ст.л", "ч.л", "зубч"]
+
+
+def load_module(name: str, path: str):
+    """
+    Загружает модуль по пути через importlib, не добавляя его в sys.modules.
+    :param name: имя модуля.
+    :param path: путь до файла.
+    :return: загруженный модуль.
+    """
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench(fn, rounds: int = 5, number: int = 1) -> dict:
+    """
+    Замеряет время выполнения функции, как pytest-benchmark: несколько раундов по number вызовов.
+    :param fn: функция без аргументов.
+    :param rounds: количество раундов.
+    :param number: количество вызовов в раунде.
+    :return: статистика времени одного вызова в секундах (min, median, mean, max) и количество раундов.
+    """
+    times = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - started) / number)
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "max": max(times),
+        "rounds": rounds,
+    }
+
+
+def make_cohort(oop, scale: dict, rng: random.Random) -> tuple:
+    """
+    Создает синтетический поток: студентов, лекторов, ревьюеров и оценки за домашние задания и лекции.
+    :param oop: модуль oop_1_-main/main.py.
+    :param scale: параметры размера данных.
+    :param rng: генератор случайных чисел.
+    :return: (студенты, лекторы, курсы, журнал оценок).
+    """
+    ledger = oop.GradeLedger()
+    courses = [f"Курс {number}" for number in range(scale["courses"])]
+    students = []
+    for number in range(scale["students"]):
+        student = oop.Student(f"Студент{number}", "Фамилия", "gender", ledger)
+        student.courses_in_progress += rng.sample(courses, min(3, len(courses)))
+        students.append(student)
+    lecturers = []
+    reviewers = []
+    for number in range(scale["lecturers"]):
+        lecturer = oop.Lecturer(f"Лектор{number}", "Фамилия", ledger)
+        reviewer = oop.Reviewer(f"Ревьюер{number}", "Фамилия")
+        lecturer.courses_attached += courses
+        reviewer.courses_attached += courses
+        lecturers.append(lecturer)
+        reviewers.append(reviewer)
+    for _ in range(scale["grades"] // 2):
+        student = rng.choice(students)
+        course = rng.choice(student.courses_in_progress)
+        rng.choice(reviewers).rate_hw(student, course, rng.randint(1, 10))
+        student.set_rates(rng.choice(lecturers), course, rng.randint(1, 10))
+    return students, lecturers, courses, ledger
+
+
+def write_cook_book(path: str, scale: dict, rng: random.Random) -> list:
+    """
+    Записывает синтетическую книгу рецептов в формате recipes.txt.
+    :param path: путь до файла.
+    :param scale: параметры размера данных.
+    :param rng: генератор случайных чисел.
+    :return: список названий блюд.
+    """
+    ingredients = [f"Ингредиент {number}" for number in range(scale["dishes"] // 2 + 10)]
+    dishes = [f"Блюдо {number}" for number in range(scale["dishes"])]
+    with open(path, "w", encoding="utf-8") as f:
+        for dish in dishes:
+            chosen = rng.sample(ingredients, scale["ingredients"])
+            f.write(f"{dish}\n{len(chosen)}\n")
+            for ingredient in chosen:
+                f.write(f"{ingredient} | {rng.randint(1, 500)} | {rng.choice(UNITS)}\n")
+            f.write("\n")
+    return dishes
+
+
+def write_text_files(directory: str, scale: dict, rng: random.Random) -> list:
+    """
+    Записывает набор текстовых файлов со случайным количеством строк для get_sorted_file.
+    :param directory: папка для файлов.
+    :param scale: параметры размера данных.
+    :param rng: генератор случайных чисел.
+    :return: список путей.
+    """
+    files = []
+    for number in range(scale["files"]):
+        path = os.path.join(directory, f"{number}.txt")
+        line = "Тревога началась в тринадцать часов ноль две минуты.\n"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(line * rng.randint(1, scale["lines"]))
+        files.append(path)
+    return files
+
+
+def bench_imports(rounds: int) -> dict:
+    """
+    Замеряет время импорта каждого модуля (модули не должны выполнять работу при импорте).
+    :param rounds: количество раундов.
+    :return: результаты по модулям; для модуля, который не удалось импортировать, - текст ошибки.
+    """
+    results = {}
+    for name, path in MODULES.items():
+        try:
+            load_module(f"bench_{name}", path)
+        except Exception as e:
+            results[f"import_{name}"] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+        results[f"import_{name}"] = bench(lambda: load_module(f"bench_{name}", path), rounds)
+    return results
+
+
+def bench_grades(scale: dict, rounds: int, rng: random.Random) -> dict:
+    """
+    Замеряет get_average_rating, average_rating_by_course и запросы к журналу оценок.
+    :param scale: параметры размера данных.
+    :param rounds: количество раундов.
+    :param rng: генератор случайных чисел.
+    :return: результаты.
+    """
+    oop = load_module("bench_oop", MODULES["oop"])
+    started = time.perf_counter()
+    students, lecturers, courses, ledger = make_cohort(oop, scale, rng)
+    results = {"grades_build": {"seconds": time.perf_counter() - started, "grades": len(ledger)}}
+    results["get_average_rating"] = bench(lambda: [student.get_average_rating() for student in students], rounds)
+    results["average_rating_by_course"] = bench(
+        lambda: [oop.average_rating_by_course(students, course) for course in courses], rounds
+    )
+    results["ledger_mean_by_course"] = bench(lambda: ledger.mean_by_course("student"), rounds)
+    results["ledger_top_lecturers"] = bench(lambda: ledger.top(10), rounds)
+    return results
+
+
+def bench_recipes(workdir: str, scale: dict, rounds: int, rng: random.Random) -> dict:
+    """
+    Замеряет get_dict и get_shop_list_by_dishes (в том числе с кэшем RecipeBook) на синтетической книге.
+    :param workdir: папка для файлов.
+    :param scale: параметры размера данных.
+    :param rounds: количество раундов.
+    :param rng: генератор случайных чисел.
+    :return: результаты.
+    """
+    files = load_module("bench_files", MODULES["files"])
+    recipes = os.path.join(workdir, "recipes.txt")
+    dishes = write_cook_book(recipes, scale, rng)
+    orders = [rng.sample(dishes, 3) for _ in range(scale["orders"])]
+    results = {"get_dict": bench(lambda: files.get_dict(recipes), rounds)}
+    files.cook_book.update(files.get_dict(recipes))
+    results["get_shop_list_by_dishes"] = bench(
+        lambda: [files.get_shop_list_by_dishes(order, 2) for order in orders], rounds
+    )
+    book = files.RecipeBook(recipes, maxsize=len(orders))
+    results["get_shop_list_by_dishes_cached"] = bench(
+        lambda: [files.get_shop_list_by_dishes(order, 2, book) for order in orders], rounds
+    )
+    results["get_shop_list_by_dishes_cached"]["cache"] = book.cache_info()
+    return results
+
+
+def bench_sorted_file(workdir: str, scale: dict, rounds: int, rng: random.Random) -> dict:
+    """
+    Замеряет get_sorted_file в обычном, потоковом и параллельном режимах.
+    :param workdir: папка для файлов.
+    :param scale: параметры размера данных.
+    :param rounds: количество раундов.
+    :param rng: генератор случайных чисел.
+    :return: результаты, в том числе пропускная способность в МБ/с по медиане.
+    """
+    files = load_module("bench_files", MODULES["files"])
+    paths = write_text_files(workdir, scale, rng)
+    size = sum(os.path.getsize(path) for path in paths) / 1024 / 1024
+    results = {}
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        for name, fn in (
+            ("get_sorted_file", lambda: files.get_sorted_file(paths)),
+            ("get_sorted_file_stream", lambda: files.get_sorted_file(paths, stream=True)),
+            ("get_sorted_file_parallel", lambda: files.get_sorted_file(paths, stream=True, pool="thread")),
+        ):
+            results[name] = bench(fn, rounds)
+            results[name]["mb_per_second"] = round(size / results[name]["median"], 2)
+    finally:
+        os.chdir(cwd)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Сравнивает медианы с сохраненными результатами.
+    :param results: текущие результаты.
+    :param baseline: результаты предыдущего запуска.
+    :param threshold: допустимое замедление (0.2 - на 20%).
+    :return: список строк с описанием регрессий.
+    """
+    regressions = []
+    for name, stats in results.items():
+        old = baseline.get(name, {})
+        if "median" in stats and "median" in old and stats["median"] > old["median"] * (1 + threshold):
+            regressions.append(f"{name}: {old['median']:.6f} с -> {stats['median']:.6f} с")
+    return regressions
+
+
+def main() -> None:
+    """
+    Точка входа: python benchmark_suite.py --scale small --output bench.json --compare baseline.json
+    """
+    parser = argparse.ArgumentParser(description="Бенчмарки импорта и основных функций всех трех проектов")
+    parser.add_argument("--scale", choices=SCALES, default="small", help="размер синтетических данных")
+    parser.add_argument("--rounds", type=int, default=5, help="количество раундов каждого замера")
+    parser.add_argument("--only", nargs="+", choices=["imports", "grades", "recipes", "sorted"],
+                        help="запустить только выбранные группы")
+    parser.add_argument("--seed", type=int, default=1, help="seed генератора данных")
+    parser.add_argument("--output", help="JSON-файл для сохранения результатов")
+    parser.add_argument("--compare", help="JSON-файл с результатами предыдущего запуска")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление относительно --compare")
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    groups = args.only or ["imports", "grades", "recipes", "sorted"]
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        if "imports" in groups:
+            results.update(bench_imports(args.rounds))
+        if "grades" in groups:
+            results.update(bench_grades(scale, args.rounds, random.Random(args.seed)))
+        if "recipes" in groups:
+            results.update(bench_recipes(workdir, scale, args.rounds, random.Random(args.seed)))
+        if "sorted" in groups:
+            results.update(bench_sorted_file(workdir, scale, args.rounds, random.Random(args.seed)))
+
+    for name, stats in results.items():
+        if "median" in stats:
+            extra = f", {stats['mb_per_second']} МБ/с" if "mb_per_second" in stats else ""
+            print(f"{name:<35} median {stats['median'] * 1000:10.3f} мс, min {stats['min'] * 1000:10.3f} мс{extra}")
+        else:
+            print(f"{name:<35} {stats}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("\nРегрессии:")
+            print("\n".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
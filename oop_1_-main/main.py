@@ -1,9 +1,315 @@
+import csv
+import heapq
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from collections.abc import Iterable, Iterator
+from itertools import islice
+
+
+class GradeStats:
+    """
+    Класс GradeStats - накопительная статистика оценок: количество, сумма, минимум, максимум
+    и дисперсия (алгоритм Уэлфорда). Обновляется за O(1) при добавлении оценки,
+    поэтому средняя оценка читается без перебора списков оценок.
+    """
+    __slots__ = ("count", "total", "min", "max", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, grade: int) -> None:
+        """
+        Функция учитывает новую оценку
+        :param grade: оценка
+        :return: None
+        """
+        self.count += 1
+        self.total += grade
+        self.min = grade if self.min is None else min(self.min, grade)
+        self.max = grade if self.max is None else max(self.max, grade)
+        delta = grade - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (grade - self.mean)
+
+    def merge(self, other: "GradeStats") -> None:
+        """
+        Функция добавляет к статистике другую статистику (например, по другому студенту)
+        :param other: экземпляр класса GradeStats
+        :return: None
+        """
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    @property
+    def average(self) -> float:
+        """
+        :return: средняя оценка (точное отношение суммы к количеству) или None, если оценок нет
+        """
+        return self.total / self.count if self.count else None
+
+    @property
+    def variance(self) -> float:
+        """
+        :return: дисперсия оценок или None, если оценок нет
+        """
+        return self.m2 / self.count if self.count else None
+
+
+class GradeLedger:
+    """
+    Класс GradeLedger - журнал оценок в колоночном виде. Подключается по желанию: оценки записываются
+    только у студентов и лекторов, созданных с параметром ledger, и журнал держит ссылки на всех оцененных.
+    Каждая оценка - строка в колонках array: id оцениваемого, id курса, id оценившего, оценка, время.
+    Оцениваемые, оценившие и курсы хранятся один раз и заменяются целочисленными id.
+    Запросы по всем студентам или лекторам сразу (средняя по курсам, лучшие лекторы, гистограмма оценок)
+    выполняются одним проходом по колонкам, без обхода словарей grades у каждого объекта.
+    """
+    __slots__ = ("people", "people_ids", "course_names", "course_ids",
+                 "subject_col", "course_col", "grader_col", "grade_col", "time_col", "journal")
+    NO_GRADER = -1
+
+    def __init__(self):
+        self.people = []
+        self.people_ids = {}
+        self.course_names = []
+        self.course_ids = {}
+        self.subject_col = array("I")
+        self.course_col = array("I")
+        self.grader_col = array("i")
+        self.grade_col = array("B")
+        self.time_col = array("d")
+        self.journal = None
+
+    def __len__(self) -> int:
+        return len(self.grade_col)
+
+    def person_id(self, person) -> int:
+        """
+        Функция возвращает id студента, лектора или ревьюера, добавляя его при первом появлении
+        :param person: экземпляр класса Student, Lecturer или Reviewer
+        :return: id
+        """
+        key = id(person)
+        if key not in self.people_ids:
+            self.people_ids[key] = len(self.people)
+            self.people.append(person)
+        return self.people_ids[key]
+
+    def course_id(self, course: str) -> int:
+        """
+        Функция возвращает id курса, добавляя его при первом появлении
+        :param course: название курса
+        :return: id
+        """
+        if course not in self.course_ids:
+            self.course_ids[course] = len(self.course_names)
+            self.course_names.append(course)
+        return self.course_ids[course]
+
+    def record(self, subject, course: str, grade: int, grader=None, timestamp: float = None) -> None:
+        """
+        Функция записывает оценку в журнал. Сначала вычисляются все значения строки,
+        и только затем они дописываются в подключенный журнал GradeJournal и во все колонки,
+        поэтому ошибка не оставляет колонки разной длины или оценку в колонках без записи в журнале.
+        :param subject: оцениваемый (Student или Lecturer)
+        :param course: название курса
+        :param grade: оценка (целое число от 1 до 10)
+        :param grader: (необязательно) оценивший (Reviewer или Student)
+        :param timestamp: (по умолчанию текущее время) время оценки
+        :return: None
+        """
+        if type(grade) != int or grade not in range(1, 11):
+            raise TypeError("Оценка должны быть целым числом от 1 до 10")
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        subject_id = self.person_id(subject)
+        course_id = self.course_id(course)
+        grader_id = self.NO_GRADER if grader is None else self.person_id(grader)
+        if self.journal is not None:
+            self.journal.write(subject, course, grade, grader, timestamp)
+        self.subject_col.append(subject_id)
+        self.course_col.append(course_id)
+        self.grader_col.append(grader_id)
+        self.grade_col.append(grade)
+        self.time_col.append(timestamp)
+
+    def rows(self, class_type: str = None, course: str = None):
+        """
+        Функция отбирает строки журнала по типу оцениваемого и курсу
+        :param class_type: (необязательно) CLASS_TYPE оцениваемого - "student" или "lecturer"
+        :param course: (необязательно) название курса
+        :return: кортежи (id оцениваемого, id курса, оценка)
+        """
+        rows = zip(self.subject_col, self.course_col, self.grade_col)
+        if class_type is not None:
+            kinds = [person.CLASS_TYPE == class_type for person in self.people]
+            rows = (row for row in rows if kinds[row[0]])
+        if course is not None:
+            if course not in self.course_ids:
+                return iter(())
+            course_id = self.course_ids[course]
+            rows = (row for row in rows if row[1] == course_id)
+        return rows
+
+    def mean_by_course(self, class_type: str = None) -> dict:
+        """
+        Функция возвращает среднюю оценку по каждому курсу за один проход по журналу
+        :param class_type: (необязательно) учитывать только студентов ("student") или лекторов ("lecturer")
+        :return: словарь вида {'Python': 8.7, 'Git': 8.0}
+        """
+        totals = array("d", bytes(8 * len(self.course_names)))
+        counts = array("I", bytes(4 * len(self.course_names)))
+        for _, course_id, grade in self.rows(class_type):
+            totals[course_id] += grade
+            counts[course_id] += 1
+        return {
+            course: round(totals[course_id] / counts[course_id], 1)
+            for course_id, course in enumerate(self.course_names) if counts[course_id]
+        }
+
+    def top(self, n: int, class_type: str = "lecturer", course: str = None) -> list:
+        """
+        Функция возвращает n оцениваемых с наибольшей средней оценкой
+        :param n: количество
+        :param class_type: (по умолчанию "lecturer") тип оцениваемых
+        :param course: (необязательно) учитывать оценки только по этому курсу
+        :return: список пар (экземпляр класса, средняя оценка) по убыванию средней
+        """
+        totals = {}
+        counts = {}
+        for subject_id, _, grade in self.rows(class_type, course):
+            totals[subject_id] = totals.get(subject_id, 0) + grade
+            counts[subject_id] = counts.get(subject_id, 0) + 1
+        best = heapq.nlargest(n, totals, key=lambda subject_id: totals[subject_id] / counts[subject_id])
+        return [(self.people[subject_id], round(totals[subject_id] / counts[subject_id], 1)) for subject_id in best]
+
+    def histogram(self, class_type: str = None, course: str = None) -> dict:
+        """
+        Функция возвращает распределение оценок
+        :param class_type: (необязательно) тип оцениваемых
+        :param course: (необязательно) название курса
+        :return: словарь “оценка -> количество” для оценок от 1 до 10
+        """
+        counts = array("I", bytes(4 * 11))
+        for _, _, grade in self.rows(class_type, course):
+            counts[grade] += 1
+        return {grade: counts[grade] for grade in range(1, 11)}
+
+
+class CourseList(list):
+    """
+    Класс CourseList - список курсов с индексом для проверки вхождения за O(1).
+    Ведет себя как обычный список (в том числе для +=), а рядом хранит счетчик курсов,
+    который обновляется при каждом изменении списка. При копировании и pickle индекс строится заново.
+    """
+    __slots__ = ("counts",)
+
+    def __init__(self, courses=()):
+        super().__init__(courses)
+        self.counts = {}
+        self.reindex()
+
+    def reindex(self) -> None:
+        """
+        Функция перестраивает индекс по текущему содержимому списка
+        :return: None
+        """
+        self.counts.clear()
+        for course in self:
+            self.counts[course] = self.counts.get(course, 0) + 1
+
+    def __contains__(self, course) -> bool:
+        return course in self.counts
+
+    def append(self, course) -> None:
+        super().append(course)
+        self.counts[course] = self.counts.get(course, 0) + 1
+
+    def insert(self, index: int, course) -> None:
+        super().insert(index, course)
+        self.counts[course] = self.counts.get(course, 0) + 1
+
+    def extend(self, courses) -> None:
+        for course in courses:
+            self.append(course)
+
+    def __iadd__(self, courses) -> "CourseList":
+        self.extend(courses)
+        return self
+
+    def discard_index(self, course) -> None:
+        """
+        Функция уменьшает счетчик курса в индексе после удаления из списка
+        :param course: название курса
+        :return: None
+        """
+        if self.counts[course] == 1:
+            del self.counts[course]
+        else:
+            self.counts[course] -= 1
+
+    def remove(self, course) -> None:
+        super().remove(course)
+        self.discard_index(course)
+
+    def pop(self, index: int = -1):
+        course = super().pop(index)
+        self.discard_index(course)
+        return course
+
+    def clear(self) -> None:
+        super().clear()
+        self.counts.clear()
+
+    def __setitem__(self, index, value) -> None:
+        super().__setitem__(index, value)
+        self.reindex()
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self.reindex()
+
+    def __imul__(self, n: int) -> "CourseList":
+        super().__imul__(n)
+        self.reindex()
+        return self
+
+    def __reduce__(self) -> tuple:
+        """
+        Функция описывает, как копировать и сериализовать список (copy, deepcopy, pickle):
+        объект создается заново из списка курсов, и индекс строится в __init__
+        :return: (класс, аргументы конструктора)
+        """
+        return type(self), (list(self),)
+
+
 class Information:
     """
     Класс Information - воспомогательный класс для реализации метода str
     Создан, чтобы избежать дублирования кода в классах Student и Mentor
-    Также содержит функцию get_average_rating, которая возвращает среднюю оценку и вызывается в методе str
+    Также содержит функцию get_average_rating, которая возвращает среднюю оценку и вызывается в методе str,
+    и функцию add_grade, через которую оценки попадают в grades, в накопительную статистику GradeStats
+    и, если он подключен, в журнал оценок GradeLedger
+    Все классы иерархии используют __slots__, чтобы экземпляры занимали меньше памяти
     """
+    __slots__ = ()
+
     def __str__(self):
         string_for_print = f"Имя: {self.name}\nФамилия: {self.surname}"
         if self.CLASS_TYPE == "lecturer":
@@ -16,14 +322,33 @@ class Information:
 
     def get_average_rating(self) -> float:
         """ Функция возвращает округлённую среднюю оценку
-        Для этого происходит распаковка всех значений словаря self.grades и подсчет средней оценки
+        Средняя берется из общей статистики total_stats, без распаковки списков оценок
         :return: средняя оценка (вещественное число) или сообщение "Оценок нет"
         """
-        if self.grades.values():
-            grades_lst = [i for a in self.grades.values() for i in a]
-            return round(sum(grades_lst) / len(grades_lst), 1)
+        if self.total_stats.count:
+            return round(self.total_stats.average, 1)
         return "Оценок нет"
 
+    def add_grade(self, course: str, grade: int, grader=None, timestamp: float = None) -> None:
+        """
+        Функция добавляет оценку в словарь grades, обновляет статистику по курсу и общую статистику
+        и записывает оценку в журнал self.ledger, если он подключен. Оценка проверяется до любых изменений
+        :param course: название курса
+        :param grade: оценка (целое число от 1 до 10)
+        :param grader: (необязательно) оценивший - экземпляр класса Reviewer или Student
+        :param timestamp: (по умолчанию текущее время) время оценки
+        :return: None
+        """
+        if type(grade) != int or grade not in range(1, 11):
+            raise TypeError("Оценка должны быть целым числом от 1 до 10")
+        if self.ledger is not None:
+            self.ledger.record(self, course, grade, grader, timestamp)
+        self.grades.setdefault(course, []).append(grade)
+        if course not in self.course_stats:
+            self.course_stats[course] = GradeStats()
+        self.course_stats[course].add(grade)
+        self.total_stats.add(grade)
+
 
 class Student(Information):
     """
@@ -31,35 +356,38 @@ class Student(Information):
     Содержит функцию set_rates для оценки лектора
     """
     CLASS_TYPE = "student"
+    __slots__ = ("ledger", "name", "surname", "gender", "finished_courses", "courses_in_progress",
+                 "grades", "course_stats", "total_stats")
 
-    def __init__(self, name: str, surname: str, gender: str):
+    def __init__(self, name: str, surname: str, gender: str, ledger: GradeLedger = None):
+        self.ledger = ledger
         self.name = name
         self.surname = surname
         self.gender = gender
-        self.finished_courses = []
-        self.courses_in_progress = []
+        self.finished_courses = CourseList()
+        self.courses_in_progress = CourseList()
         self.grades = {}
+        self.course_stats = {}
+        self.total_stats = GradeStats()
 
     def set_rates(self, lecturer: "Lecturer", course: str, grade: int) -> None:
         """
         Функция присваивает оценку лектору. Присваивание оценки происходит после проверок на причастность студента к курсу,
         а также причастность лектора к курсу, корректность оценки.
-        Перед присваиванием оценки идёт обновление словаря grades для лектора в соответствующем метод - update_rating().
-        Это необходимо для синхронизации курсов лектора и ключей в словаре с оценками,
-        так как при добавлении курсов courses_attached нет связи со словарем grades.
+        Списки курсов - CourseList, поэтому проверки выполняются за O(1), а ключ курса
+        в словаре grades лектора создается при добавлении оценки (add_grade).
         :param lecturer: экземпляр класса Lecturer
         :param course: название курса
         :param grade: оценка (целое число от 1 до 10)
         :return: None
         """
-        if not course in self.courses_in_progress + self.finished_courses:
+        if course not in self.courses_in_progress and course not in self.finished_courses:
             raise ValueError("Студент не был на данном курсе")
         if course not in lecturer.courses_attached:
             raise ValueError("Данный лектор не ведёт этот курс")
         if type(grade) != int or grade not in range(1, 11):
             raise TypeError("Оценка должны быть целым числом от 1 до 10")
-        lecturer.update_rating()
-        lecturer.grades[course] += [grade]
+        lecturer.add_grade(course, grade, self)
 
 
 class Mentor(Information):
@@ -67,10 +395,12 @@ class Mentor(Information):
     Класс Mentor унаследован от класса Information для реализации метода str
     Описывает общие характеристики лекторов и ревьюеров
     """
+    __slots__ = ("name", "surname", "courses_attached")
+
     def __init__(self, name, surname):
         self.name = name
         self.surname = surname
-        self.courses_attached = []
+        self.courses_attached = CourseList()
 
 
 class Lecturer(Mentor):
@@ -79,19 +409,23 @@ class Lecturer(Mentor):
     Содержит воспомогательную функцию update_rating
     """
     CLASS_TYPE = "lecturer"
+    __slots__ = ("ledger", "grades", "course_stats", "total_stats")
 
-    def __init__(self, name: str, surname: str):
+    def __init__(self, name: str, surname: str, ledger: GradeLedger = None):
         super().__init__(name, surname)
+        self.ledger = ledger
         self.grades = {}
+        self.course_stats = {}
+        self.total_stats = GradeStats()
 
     def update_rating(self) -> None:
         """
-        Функция обновляет исходный словарь grades (добавляет ключи из списка courses_attached)
+        Функция обновляет исходный словарь grades (добавляет ключи из списка courses_attached).
+        При выставлении оценок не вызывается: ключ курса создается в add_grade
         :return: None
         """
         for course in self.courses_attached:
-            if course not in self.grades:
-                self.grades[course] = []
+            self.grades.setdefault(course, [])
 
 
 class Reviewer(Mentor):
@@ -100,6 +434,7 @@ class Reviewer(Mentor):
     Предназначен для оценки студентов - метод rate_hw
     """
     CLASS_TYPE = "reviewer"
+    __slots__ = ()
 
     def rate_hw(self, student: Student, course: str, grade: int) -> None:
         """
@@ -109,102 +444,534 @@ class Reviewer(Mentor):
         :param grade: оценка (целое число от 1 до 10)
         :return: None
         """
-        if isinstance(student, Student) and course in self.courses_attached and course in student.courses_in_progress:
-            if course in student.grades:
-                student.grades[course] += [grade]
-            else:
-                student.grades[course] = [grade]
-        else:
+        if not (isinstance(student, Student) and course in self.courses_attached
+                and course in student.courses_in_progress):
             raise ValueError("Ошибка в оценке")
+        if type(grade) != int or grade not in range(1, 11):
+            raise TypeError("Оценка должны быть целым числом от 1 до 10")
+        student.add_grade(course, grade, self)
 
 
-student_1 = Student('Some', 'Student', 'your_gender')
-student_1.courses_in_progress += ['Python']
-student_1.courses_in_progress += ['Git']
-student_1.finished_courses += ["C++"]
-student_2 = Student('Some2', 'Student2', 'your_gender')
-student_2.courses_in_progress += ['Python']
-student_2.courses_in_progress += ['Git', "C++"]
-student_2.finished_courses += ["java"]
-
-lecturer_1 = Lecturer('Some', 'Lecturer')
-lecturer_1.courses_attached += ['Python']
-lecturer_1.courses_attached += ['Git']
-lecturer_2 = Lecturer('Some2', 'Lecturer2')
-lecturer_2.courses_attached += ['Git']
-lecturer_2.courses_attached += ['C++']
-
-reviewer_1 = Reviewer('Some', 'Reviewer')
-reviewer_1.courses_attached += ['Python']
-reviewer_2 = Reviewer('Some2', 'Reviewer2')
-reviewer_2.courses_attached += ['Git']
-reviewer_2.courses_attached += ['C++']
-
-reviewer_1.rate_hw(student_1, 'Python', 9)
-reviewer_1.rate_hw(student_1, 'Python', 10)
-reviewer_2.rate_hw(student_1, 'Git', 8)
-reviewer_2.rate_hw(student_2, 'Git', 7)
-reviewer_2.rate_hw(student_2, 'C++', 8)
-reviewer_1.rate_hw(student_1, 'Python', 7)
-
-student_1.set_rates(lecturer_1, 'Python', 8)
-student_1.set_rates(lecturer_1, 'Python', 9)
-student_1.set_rates(lecturer_1, 'Git', 10)
-student_2.set_rates(lecturer_2, 'Git', 9)
-student_2.set_rates(lecturer_2, 'C++', 10)
-
-print("Информация о студентах: ")
-print(student_1)
-print(student_2)
-print()
-
-print("Информация о лекторах: ")
-print(lecturer_1)
-print(lecturer_2)
-print()
-
-print("Информация о ревьюерах: ")
-print(reviewer_1)
-print(reviewer_2)
-print()
+def read_grade_records(path: str) -> Iterator[dict]:
+    """
+    Генератор читает записи об оценках из выгрузки CSV, JSON или JSONL (по расширению файла).
+    Каждая запись - словарь с ключами grader (кто оценил), subject (кого оценили), course и grade.
+    Файлы CSV и JSONL читаются потоково, JSON - целиком (ожидается список записей).
+    Оценка из CSV, которая не является целым числом, остается строкой, а нечитаемая строка JSONL
+    передается как есть (строкой) - такие записи отклоняет Cohort.check, не прерывая загрузку.
+    :param path: путь до файла
+    :return: словари записей
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if extension == ".csv":
+            for record in csv.DictReader(f):
+                grade = record.get("grade")
+                if grade is not None:
+                    try:
+                        record["grade"] = int(grade)
+                    except ValueError:
+                        pass
+                yield record
+        elif extension == ".jsonl":
+            for line in f:
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        record = line.rstrip("\r\n")
+                    yield record
+        elif extension == ".json":
+            yield from json.load(f)
+        else:
+            raise ValueError(f"Неизвестный формат файла {path}")
 
 
-def average_rating_by_course(appreciated: list, course: str) -> float:
-    """ Функция возвращает среднюю оценку по курсу
-    По заданию требуется реализовать 2 функции, но так как функционал у них один, решил оставить 1 функцию
-    :param appreciated: студентов или лекторов, экземпляры классов Student или Lecturer
-    :param course: название курса
-    :return: средняя оценка
+class Cohort:
     """
-    ratings = []
-    for subject in appreciated:
-        if course in subject.grades:
-            ratings += subject.grades[course]
-    return round(sum(ratings) / len(ratings), 1)
+    Класс Cohort - реестр студентов, лекторов и ревьюеров потока по ключам (по умолчанию “Имя Фамилия”).
+    Нужен для массовой загрузки оценок из выгрузок: записи проверяются пачками по тем же правилам,
+    что и в Reviewer.rate_hw и Student.set_rates, корректные применяются, а отклоненные попадают в отчет.
+    Поток можно сохранить в двоичный снимок (save) и восстановить из снимка и журнала новых оценок (load).
+    Каждый снимок получает следующий номер поколения (generation), которым помечаются и записи журнала.
+    """
+    __slots__ = ("people", "keys", "journal", "generation")
 
+    def __init__(self, people: Iterable = ()):
+        self.people = {}
+        self.keys = {}
+        self.journal = None
+        self.generation = 0
+        for person in people:
+            self.add(person)
 
-print("Средняя оценка студентов по курсу Python: ")
-print(average_rating_by_course([student_1, student_2], 'Python'))
-print()
+    def add(self, person, key: str = None) -> str:
+        """
+        Функция добавляет участника в реестр
+        :param person: экземпляр класса Student, Lecturer или Reviewer
+        :param key: (по умолчанию “Имя Фамилия”) ключ участника в записях
+        :return: ключ
+        """
+        key = key or f"{person.name} {person.surname}"
+        if key in self.people and self.people[key] is not person:
+            raise ValueError(f"Ключ {key} уже занят")
+        self.people[key] = person
+        self.keys[id(person)] = key
+        return key
+
+    def key_of(self, person) -> str:
+        """
+        Функция возвращает ключ участника
+        :param person: экземпляр класса Student, Lecturer или Reviewer
+        :return: ключ
+        """
+        if id(person) not in self.keys:
+            raise ValueError(f"{person.name} {person.surname} не зарегистрирован в потоке")
+        return self.keys[id(person)]
 
-print("Средняя оценка студентов по курсу Git: ")
-print(average_rating_by_course([student_1, student_2], 'Git'))
-print()
+    def attach_journal(self, path: str, ledger: GradeLedger) -> "GradeJournal":
+        """
+        Функция подключает журнал новых оценок: каждая оценка, записанная в ledger, дописывается в файл
+        :param path: путь до файла журнала
+        :param ledger: журнал оценок участников
+        :return: экземпляр класса GradeJournal
+        """
+        if self.journal is not None:
+            self.journal.close()
+        self.journal = GradeJournal(path, self)
+        ledger.journal = self.journal
+        return self.journal
 
-print("Средняя оценка студентов по курсу C++: ")
-print(average_rating_by_course([student_1, student_2], 'C++'))
-print()
+    def save(self, path: str, ledger: GradeLedger) -> None:
+        """
+        Функция сохраняет участников, их курсы и оценки в двоичный снимок (формат описан в GradeSnapshot).
+        Файл записывается во временный и атомарно подменяется; подключенный журнал после этого очищается.
+        Снимок получает следующий номер поколения, поэтому если сбой случится между подменой снимка
+        и очисткой журнала, Cohort.load пропустит записи журнала прошлого поколения, уже вошедшие в снимок.
+        :param path: путь до файла снимка
+        :param ledger: журнал оценок, сохраняются оценки участников потока
+        :return: None
+        """
+        people = list(self.people.items())
+        numbers = {id(person): number for number, (_, person) in enumerate(people)}
+        meta_people = []
+        for key, person in people:
+            data = {"key": key, "type": person.CLASS_TYPE, "name": person.name, "surname": person.surname}
+            if isinstance(person, Student):
+                data["gender"] = person.gender
+                data["courses_in_progress"] = list(person.courses_in_progress)
+                data["finished_courses"] = list(person.finished_courses)
+            else:
+                data["courses_attached"] = list(person.courses_attached)
+            meta_people.append(data)
+        subjects = [numbers.get(id(person)) for person in ledger.people]
+        columns = [array("d"), array("I"), array("I"), array("i"), array("B")]
+        course_names = []
+        course_ids = {}
+        for row in zip(ledger.time_col, ledger.subject_col, ledger.course_col, ledger.grader_col, ledger.grade_col):
+            timestamp, subject_id, course_id, grader_id, grade = row
+            if subjects[subject_id] is None:
+                continue
+            course = ledger.course_names[course_id]
+            if course not in course_ids:
+                course_ids[course] = len(course_names)
+                course_names.append(course)
+            grader = None if grader_id == GradeLedger.NO_GRADER else subjects[grader_id]
+            values = (timestamp, subjects[subject_id], course_ids[course],
+                      GradeLedger.NO_GRADER if grader is None else grader, grade)
+            for column, value in zip(columns, values):
+                column.append(value)
+        meta = json.dumps({"courses": course_names, "people": meta_people}, ensure_ascii=False).encode("utf-8")
+        generation = self.generation + 1
+        with open(path + ".tmp", "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, len(meta), len(columns[0]), generation))
+            f.write(meta)
+            f.write(bytes(-f.tell() % 8))
+            for column in columns:
+                column.tofile(f)
+        os.replace(path + ".tmp", path)
+        self.generation = generation
+        if self.journal is not None:
+            self.journal.truncate()
+
+    @classmethod
+    def load(cls, path: str, journal: str = None, ledger: GradeLedger = None) -> "Cohort":
+        """
+        Функция восстанавливает поток из снимка и дописанного после него журнала.
+        Оценки снимка и журнала применяются через add_grade без повторных проверок,
+        с исходным временем оценки. Записи журнала прошлых поколений (уже вошедшие в снимок) пропускаются.
+        Если указан журнал, после загрузки он подключается для новых оценок. Журнал, подключенный к ledger
+        до загрузки, восстанавливается и при ошибке.
+        :param path: путь до файла снимка
+        :param journal: (необязательно) путь до файла журнала GradeJournal
+        :param ledger: (по умолчанию новый GradeLedger) журнал оценок для восстановленных участников
+        :return: экземпляр класса Cohort
+        """
+        ledger = GradeLedger() if ledger is None else ledger
+        attached, ledger.journal = ledger.journal, None
+        try:
+            cohort = cls()
+            with GradeSnapshot(path) as snapshot:
+                cohort.generation = snapshot.generation
+                people = []
+                for data in snapshot.meta["people"]:
+                    person = make_person(data, ledger)
+                    cohort.add(person, data["key"])
+                    people.append(person)
+                courses = snapshot.meta["courses"]
+                view = snapshot.ledger
+                for timestamp, subject_id, course_id, grader_id, grade in zip(
+                        view.time_col, view.subject_col, view.course_col, view.grader_col, view.grade_col):
+                    grader = None if grader_id == GradeLedger.NO_GRADER else people[grader_id]
+                    people[subject_id].add_grade(courses[course_id], grade, grader, timestamp)
+            people = cohort.people
+            for record in GradeJournal.read(journal) if journal is not None else ():
+                generation = record.get("generation", cohort.generation)
+                if generation < cohort.generation:
+                    continue
+                grader = record["grader"]
+                if generation > cohort.generation or record["subject"] not in people \
+                        or grader is not None and grader not in people:
+                    raise ValueError(f"Журнал {journal} не соответствует снимку: {record}")
+                people[record["subject"]].add_grade(record["course"], record["grade"],
+                                                    None if grader is None else people[grader], record["time"])
+        finally:
+            ledger.journal = attached
+        if journal is not None:
+            cohort.attach_journal(journal, ledger)
+        return cohort
+
+    def check(self, record: dict) -> str:
+        """
+        Функция проверяет одну запись об оценке
+        :param record: словарь с ключами grader, subject, course, grade
+        :return: None, если запись корректна, иначе текст ошибки
+        """
+        if isinstance(record, str):
+            return "Не удалось разобрать запись"
+        if not isinstance(record, dict):
+            return "Запись должна быть словарем"
+        try:
+            grader = self.people[record["grader"]]
+            subject = self.people[record["subject"]]
+            course = record["course"]
+            grade = record["grade"]
+        except KeyError as e:
+            return f"Неизвестный участник или нет поля {e}"
+        except TypeError:
+            return "Участник должен быть задан строкой-ключом"
+        if not isinstance(course, str):
+            return "Название курса должно быть строкой"
+        if type(grade) != int or grade not in range(1, 11):
+            return "Оценка должны быть целым числом от 1 до 10"
+        if isinstance(grader, Reviewer) and isinstance(subject, Student):
+            if course in grader.courses_attached and course in subject.courses_in_progress:
+                return None
+            return "Ошибка в оценке"
+        if isinstance(grader, Student) and isinstance(subject, Lecturer):
+            if course not in grader.courses_in_progress and course not in grader.finished_courses:
+                return "Студент не был на данном курсе"
+            if course not in subject.courses_attached:
+                return "Данный лектор не ведёт этот курс"
+            return None
+        return f"{grader.CLASS_TYPE} не может оценивать {subject.CLASS_TYPE}"
+
+    def ingest(self, records: Iterable[dict], batch_size: int = 10000) -> dict:
+        """
+        Функция массово загружает оценки. Записи читаются пачками по batch_size:
+        сначала проверяется вся пачка, затем корректные записи применяются одним проходом через add_grade.
+        Ошибка в записи не прерывает загрузку - запись попадает в отчет об отклоненных.
+        :param records: записи об оценках (например, из read_grade_records)
+        :param batch_size: (по умолчанию 10000) размер пачки
+        :return: отчет вида {'applied': 120, 'rejected': [{'index': 5, 'record': {...}, 'error': '...'}]}
+        """
+        applied = 0
+        rejected = []
+        records = enumerate(records)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            valid = []
+            for index, record in batch:
+                error = self.check(record)
+                if error is None:
+                    valid.append(record)
+                else:
+                    rejected.append({"index": index, "record": record, "error": error})
+            people = self.people
+            for record in valid:
+                people[record["subject"]].add_grade(record["course"], record["grade"], people[record["grader"]])
+            applied += len(valid)
+        return {"applied": applied, "rejected": rejected}
+
+
+SNAPSHOT_MAGIC = b"GRDS"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct("<4sHHIQQ")
+
+
+class GradeJournal:
+    """
+    Класс GradeJournal - журнал новых оценок с момента последнего снимка (только дозапись).
+    Каждая оценка - строка JSON в формате записей Cohort.ingest с добавлением времени оценки
+    и поколения снимка потока (Cohort.generation), после которого она сделана.
+    Подключается к GradeLedger (Cohort.attach_journal) и пишет каждую оценку участника потока, прошедшую через add_grade.
+    Файл открывается в двоичном режиме. Незавершенная или нечитаемая последняя строка (после сбоя при записи)
+    при чтении пропускается, а при подключении журнала отрезается, чтобы новые записи начинались с новой строки.
+    """
+    __slots__ = ("path", "cohort", "file")
+
+    def __init__(self, path: str, cohort: "Cohort"):
+        self.path = path
+        self.cohort = cohort
+        self.file = open(path, "a+b")
+        size = end = self.file.seek(0, os.SEEK_END)
+        while end:
+            start = max(0, end - 4096)
+            self.file.seek(start)
+            position = self.file.read(end - start).rfind(b"\n")
+            if position != -1:
+                end = start + position + 1
+                break
+            end = start
+        if end != size:
+            self.file.truncate(end)
+
+    def write(self, subject, course: str, grade: int, grader, timestamp: float) -> None:
+        """
+        Функция дописывает оценку в журнал. Оценки участников, не зарегистрированных в потоке, пропускаются,
+        а оценивший не из потока записывается как None - так же, как они попадают в снимок (Cohort.save).
+        :param subject: оцениваемый
+        :param course: название курса
+        :param grade: оценка
+        :param grader: оценивший или None
+        :param timestamp: время оценки
+        :return: None
+        """
+        keys = self.cohort.keys
+        if id(subject) not in keys:
+            return
+        record = {
+            "grader": None if grader is None else keys.get(id(grader)),
+            "subject": keys[id(subject)],
+            "course": course,
+            "grade": grade,
+            "time": timestamp,
+            "generation": self.cohort.generation,
+        }
+        self.file.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.file.flush()
+
+    @staticmethod
+    def read(path: str) -> Iterator[dict]:
+        """
+        Генератор читает записи журнала. Строки декодируются по одной; незавершенная или нечитаемая
+        последняя строка пропускается, нечитаемая строка в середине журнала - ошибка
+        :param path: путь до файла журнала
+        :return: словари записей
+        """
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            line = f.readline()
+            while line:
+                following = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    if not following:
+                        break
+                    raise ValueError(f"Журнал {path} поврежден: {line!r}") from e
+                yield record
+                line = following
+
+    def truncate(self) -> None:
+        """
+        Функция очищает журнал (после сохранения снимка)
+        :return: None
+        """
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.flush()
 
-print("Средняя оценка лекторов по курсу Python: ")
-print(average_rating_by_course([lecturer_1, lecturer_2], 'Python'))
-print()
+    def close(self) -> None:
+        self.file.close()
 
-print("Средняя оценка лекторов по курсу Git: ")
-print(average_rating_by_course([lecturer_1, lecturer_2], 'Git'))
-print()
 
-print("Средняя оценка лекторов по курсу C++: ")
-print(average_rating_by_course([lecturer_1, lecturer_2], 'C++'))
+class GradeSnapshot:
+    """
+    Класс GradeSnapshot - снимок потока в двоичном файле, открытый только для чтения через mmap.
+    Формат: заголовок SNAPSHOT_HEADER (сигнатура, версия, флаги, длина метаданных, количество оценок,
+    поколение снимка),
+    метаданные JSON (курсы и участники с их курсами), выравнивание до 8 байт и колонки оценок
+    (время 'd', оцениваемый 'I', курс 'I', оценивший 'i', оценка 'B').
+    Колонки не копируются: ledger - GradeLedger, колонки которого - memoryview над отображенным файлом,
+    поэтому процессы отчетов открывают снимок за миллисекунды и делят одни и те же страницы памяти.
+    Оценки из журнала GradeJournal в ledger не попадают; полная модель загружается через Cohort.load.
+    """
+    __slots__ = ("path", "file", "mm", "meta", "people", "ledger", "generation")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, meta_length, count, self.generation = SNAPSHOT_HEADER.unpack_from(self.mm)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"Файл {path} не является снимком версии {SNAPSHOT_VERSION}")
+        offset = SNAPSHOT_HEADER.size
+        self.meta = json.loads(self.mm[offset:offset + meta_length].decode("utf-8"))
+        self.people = [make_person(data, None) for data in self.meta["people"]]
+        offset += meta_length
+        offset += -offset % 8
+        view = memoryview(self.mm)
+        ledger = self.ledger = GradeLedger()
+        for name, typecode in (("time_col", "d"), ("subject_col", "I"), ("course_col", "I"),
+                               ("grader_col", "i"), ("grade_col", "B")):
+            size = array(typecode).itemsize * count
+            setattr(ledger, name, view[offset:offset + size].cast(typecode))
+            offset += size
+        view.release()
+        ledger.people = self.people
+        ledger.people_ids = {id(person): number for number, person in enumerate(self.people)}
+        ledger.course_names = self.meta["courses"]
+        ledger.course_ids = {course: number for number, course in enumerate(ledger.course_names)}
+
+    def __enter__(self) -> "GradeSnapshot":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Функция освобождает колонки и закрывает отображение файла
+        :return: None
+        """
+        for name in ("time_col", "subject_col", "course_col", "grader_col", "grade_col"):
+            getattr(self.ledger, name).release()
+            setattr(self.ledger, name, array("B"))
+        self.mm.close()
+        self.file.close()
 
 
+def make_person(data: dict, ledger: GradeLedger):
+    """
+    Функция создает участника по описанию из метаданных снимка (без оценок)
+    :param data: словарь с ключами type, name, surname и курсами
+    :param ledger: журнал оценок для студентов и лекторов или None, если оценки не записываются
+    :return: экземпляр класса Student, Lecturer или Reviewer
+    """
+    if data["type"] == "student":
+        person = Student(data["name"], data["surname"], data["gender"], ledger)
+        person.courses_in_progress = CourseList(data["courses_in_progress"])
+        person.finished_courses = CourseList(data["finished_courses"])
+        return person
+    if data["type"] == "lecturer":
+        person = Lecturer(data["name"], data["surname"], ledger)
+    elif data["type"] == "reviewer":
+        person = Reviewer(data["name"], data["surname"])
+    else:
+        raise ValueError(f"Неизвестный тип участника {data['type']}")
+    person.courses_attached = CourseList(data["courses_attached"])
+    return person
 
+
+def average_rating_by_course(appreciated: list, course: str) -> float:
+    """ Функция возвращает среднюю оценку по курсу
+    По заданию требуется реализовать 2 функции, но так как функционал у них один, решил оставить 1 функцию
+    :param appreciated: студентов или лекторов, экземпляры классов Student или Lecturer
+    :param course: название курса
+    :return: средняя оценка или сообщение "Оценок нет"
+    """
+    stats = GradeStats()
+    for subject in appreciated:
+        if course in subject.course_stats:
+            stats.merge(subject.course_stats[course])
+    if stats.count:
+        return round(stats.average, 1)
+    return "Оценок нет"
+
+
+def main() -> None:
+    """
+    Демонстрация: создает студентов, лекторов и ревьюеров, выставляет оценки и печатает отчеты
+    """
+    student_1 = Student('Some', 'Student', 'your_gender')
+    student_1.courses_in_progress += ['Python']
+    student_1.courses_in_progress += ['Git']
+    student_1.finished_courses += ["C++"]
+    student_2 = Student('Some2', 'Student2', 'your_gender')
+    student_2.courses_in_progress += ['Python']
+    student_2.courses_in_progress += ['Git', "C++"]
+    student_2.finished_courses += ["java"]
+
+    lecturer_1 = Lecturer('Some', 'Lecturer')
+    lecturer_1.courses_attached += ['Python']
+    lecturer_1.courses_attached += ['Git']
+    lecturer_2 = Lecturer('Some2', 'Lecturer2')
+    lecturer_2.courses_attached += ['Git']
+    lecturer_2.courses_attached += ['C++']
+
+    reviewer_1 = Reviewer('Some', 'Reviewer')
+    reviewer_1.courses_attached += ['Python']
+    reviewer_2 = Reviewer('Some2', 'Reviewer2')
+    reviewer_2.courses_attached += ['Git']
+    reviewer_2.courses_attached += ['C++']
+
+    reviewer_1.rate_hw(student_1, 'Python', 9)
+    reviewer_1.rate_hw(student_1, 'Python', 10)
+    reviewer_2.rate_hw(student_1, 'Git', 8)
+    reviewer_2.rate_hw(student_2, 'Git', 7)
+    reviewer_2.rate_hw(student_2, 'C++', 8)
+    reviewer_1.rate_hw(student_1, 'Python', 7)
+
+    student_1.set_rates(lecturer_1, 'Python', 8)
+    student_1.set_rates(lecturer_1, 'Python', 9)
+    student_1.set_rates(lecturer_1, 'Git', 10)
+    student_2.set_rates(lecturer_2, 'Git', 9)
+    student_2.set_rates(lecturer_2, 'C++', 10)
+
+    print("Информация о студентах: ")
+    print(student_1)
+    print(student_2)
+    print()
+
+    print("Информация о лекторах: ")
+    print(lecturer_1)
+    print(lecturer_2)
+    print()
+
+    print("Информация о ревьюерах: ")
+    print(reviewer_1)
+    print(reviewer_2)
+    print()
+
+    print("Средняя оценка студентов по курсу Python: ")
+    print(average_rating_by_course([student_1, student_2], 'Python'))
+    print()
+
+    print("Средняя оценка студентов по курсу Git: ")
+    print(average_rating_by_course([student_1, student_2], 'Git'))
+    print()
+
+    print("Средняя оценка студентов по курсу C++: ")
+    print(average_rating_by_course([student_1, student_2], 'C++'))
+    print()
+
+    print("Средняя оценка лекторов по курсу Python: ")
+    print(average_rating_by_course([lecturer_1, lecturer_2], 'Python'))
+    print()
+
+    print("Средняя оценка лекторов по курсу Git: ")
+    print(average_rating_by_course([lecturer_1, lecturer_2], 'Git'))
+    print()
+
+    print("Средняя оценка лекторов по курсу C++: ")
+    print(average_rating_by_course([lecturer_1, lecturer_2], 'C++'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import argparse
+import importlib
+import itertools
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class FakeAPI(BaseHTTPRequestHandler):
+    """
+    Обработчик локального тестового сервера, который имитирует API VK (photos.get, execute)
+    и API Яндекс.Диска (папки, загрузка по URL, операции, прямая загрузка), а также отдает
+    содержимое фотографий. Задержка и доля ошибок задаются атрибутами класса сервера.
+    """
+    protocol_version = "HTTP/1.1"
+    wbufsize = 64 * 1024
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def send_json(self, status: int, data: dict) -> None:
+        """
+        Отправляет JSON-ответ одним блоком.
+        :param status: HTTP-статус.
+        :param data: тело ответа.
+        """
+        self.send_body(status, json.dumps(data).encode(), "application/json")
+
+    def send_body(self, status: int, body: bytes, content_type: str) -> None:
+        """
+        Отправляет ответ с телом одним блоком.
+        :param status: HTTP-статус.
+        :param body: тело ответа.
+        :param content_type: тип содержимого.
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.wfile.flush()
+
+    def photos(self, owner_id: int, album_id: str, offset: int, count: int) -> dict:
+        """
+        Формирует ответ photos.get для альбома из server.photos фотографий.
+        """
+        total = self.server.photos
+        items = [{
+            "id": i,
+            "owner_id": owner_id,
+            "album_id": album_id,
+            "date": 1700000000 + i,
+            "likes": {"count": i % 10},
+            "sizes": [
+                {"type": "s", "width": 75, "height": 50, "url": f"{self.server.url}/img/{i}s"},
+                {"type": "z", "width": 1280, "height": 853, "url": f"{self.server.url}/img/{i}z"},
+            ],
+        } for i in range(offset, min(total, offset + count))]
+        return {"count": total, "items": items}
+
+    def handle_request(self) -> None:
+        """
+        Разбирает запрос, имитирует задержку и ошибки и отвечает как соответствующий API.
+        """
+        url = urlsplit(self.path)
+        query = {key: value[0] for key, value in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        time.sleep(self.server.latency)
+        failed = random.random() < self.server.error_rate
+
+        if url.path.startswith("/method/"):
+            if failed:
+                return self.send_json(200, {"error": {"error_code": 6, "error_msg": "Too many requests per second"}})
+            if url.path.endswith("/execute"):
+                calls = [json.loads(call) for call in re.findall(r"API\.photos\.get\((\{.*?\})\)", query["code"])]
+                return self.send_json(200, {"response": [
+                    self.photos(call["owner_id"], call["album_id"], 0, call["count"]) for call in calls
+                ]})
+            return self.send_json(200, {"response": self.photos(
+                int(query["owner_id"]), query["album_id"], int(query.get("offset", 0)), int(query["count"])
+            )})
+        if url.path.startswith("/img/"):
+            return self.send_body(200, url.path.encode() * (self.server.photo_size // len(url.path) + 1), "image/jpeg")
+        if failed:
+            return self.send_json(503, {"message": "Service unavailable"})
+        if url.path.startswith("/upload/"):
+            return self.send_json(201, {})
+        if url.path.startswith("/v1/disk/operations/"):
+            return self.send_json(200, {"status": "success"})
+        if url.path == "/v1/disk/resources/upload":
+            if self.command == "POST":
+                operation = next(self.server.operations)
+                return self.send_json(202, {"href": f"{self.server.url}/v1/disk/operations/{operation}"})
+            return self.send_json(200, {"href": f"{self.server.url}/upload/{query['path']}"})
+        if self.command == "PUT":
+            return self.send_json(201, {})
+        if "_embedded" in query.get("fields", ""):
+            return self.send_json(200, {"_embedded": {"items": [], "total": 0}})
+        return self.send_json(200, {"size": self.server.photo_size})
+
+    do_GET = do_POST = do_PUT = handle_request
+
+
+def start_server(latency: float, error_rate: float, photos: int, photo_size: int) -> ThreadingHTTPServer:
+    """
+    Запускает тестовый сервер в фоновом потоке.
+    :param latency: задержка ответа в секундах.
+    :param error_rate: доля запросов, завершающихся ошибкой (VK - код 6, Яндекс.Диск - 503).
+    :param photos: количество фотографий в каждом альбоме.
+    :param photo_size: размер содержимого одной фотографии в байтах.
+    :return: запущенный сервер, его адрес в атрибуте url.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAPI)
+    server.daemon_threads = True
+    server.latency = latency
+    server.error_rate = error_rate
+    server.photos = photos
+    server.photo_size = photo_size
+    server.operations = itertools.count(1)
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_benchmark(app, args: argparse.Namespace) -> dict:
+    """
+    Прогоняет конвейер Interface на тестовом сервере и возвращает сводку и метрики.
+    Режим batch - Interface.run_batch для нескольких пользователей, режим stream - Interface.run
+    для одного пользователя с ответами на вопросы интерфейса.
+    :param app: модуль main.py.
+    :param args: аргументы командной строки.
+    :return: словарь с результатами.
+    """
+    server = start_server(args.latency, args.error_rate, args.photos, args.photo_size)
+    app.VK_API_URL = f"{server.url}/method/"
+    app.YD_API_URL = f"{server.url}/v1/disk/resources"
+    metrics = app.Metrics()
+    interface = app.Interface("token", metrics)
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        if args.mode == "batch":
+            users = [str(user_id) for user_id in range(1, args.users + 1)]
+            interface.run_batch(users, ["profile"], "token", args.photos, local=args.local)
+            total = args.users * args.photos
+        else:
+            with mock.patch("builtins.input", side_effect=["1", "token", "2", str(args.photos)]):
+                interface.run()
+            total = args.photos
+        os.chdir(HERE)
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+    return {
+        "mode": args.mode,
+        "photos": total,
+        "elapsed": round(elapsed, 3),
+        "photos_per_second": round(total / elapsed, 2),
+        "metrics": metrics.to_dict(),
+    }
+
+
+def main() -> None:
+    """
+    Точка входа бенчмарка: python benchmark.py --mode batch --users 20 --photos 50 --latency 0.02
+    """
+    parser = argparse.ArgumentParser(description="Бенчмарк загрузки фото на локальном тестовом сервере")
+    parser.add_argument("--mode", choices=["batch", "stream"], default="batch", help="режим Interface")
+    parser.add_argument("--users", type=int, default=10, help="количество пользователей в режиме batch")
+    parser.add_argument("--photos", type=int, default=50, help="количество фото в альбоме")
+    parser.add_argument("--photo-size", type=int, default=100 * 1024, help="размер фото в байтах")
+    parser.add_argument("--latency", type=float, default=0.02, help="задержка ответа сервера в секундах")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой")
+    parser.add_argument("--local", action="store_true", help="локальное скачивание с проверкой дубликатов")
+    parser.add_argument("--output", help="JSON-файл для сохранения результатов")
+    args = parser.parse_args()
+
+    app = importlib.import_module("main")
+    result = run_benchmark(app, args)
+    print(f"\nФото: {result['photos']}, время: {result['elapsed']} с, {result['photos_per_second']} фото/с")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(result["metrics"], ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,306 @@
+import argparse
 import configparser
+import functools
+import hashlib
+import heapq
+import itertools
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pprint import pprint
 import json
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from tqdm import tqdm
 
 
-config = configparser.ConfigParser()
-config.read("settings.ini")
+# Адреса API. Могут быть переопределены до создания клиентов, например для запуска на тестовом сервере.
+VK_API_URL = "https://api.vk.com/method/"
+YD_API_URL = "https://cloud-api.yandex.net/v1/disk/resources"
+# Код ошибки VK API "Слишком много запросов в секунду".
+VK_TOO_MANY_REQUESTS = 6
+# Максимальное количество фотографий, которое photos.get возвращает за один вызов.
+VK_PHOTOS_PAGE_SIZE = 1000
+# Максимальное количество вызовов API внутри одного запроса execute.
+VK_EXECUTE_LIMIT = 25
+# Файл журнала загруженных фотографий по умолчанию.
+MANIFEST_FILE = "manifest.jsonl"
+# Типы размеров фотографий VK в порядке возрастания, используются если ширина и высота неизвестны.
+VK_SIZE_TYPES = "smopqrxyzw"
 
-vk_token = config["Tokens"]["vk_token"]
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов по алгоритму “ведро с токенами”, общий для всех потоков.
+    Токены пополняются со скоростью rate в секунду, но не больше capacity;
+    каждый запрос забирает один токен и ждет, если токенов нет.
+    """
+    def __init__(self, rate: float, capacity: float = None) -> None:
+        """
+        Инициализирует экземпляр класса TokenBucket.
+        :param rate: количество запросов в секунду.
+        :param capacity: (по умолчанию равно rate, но не меньше 1) максимальный размер всплеска запросов.
+        """
+        if rate <= 0:
+            raise ValueError("Частота запросов должна быть больше нуля")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Забирает один токен, при необходимости ожидая его появления.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait_time:
+            time.sleep(wait_time)
+
+
+def select_size(sizes: list, strategy="largest") -> dict:
+    """
+    Выбирает размер фотографии из списка sizes ответа VK. Порядок элементов в списке VK не гарантирует,
+    поэтому размеры сравниваются по площади (ширина*высота), а при её отсутствии по типу.
+    Стратегии:
+    - “largest” - самый большой размер;
+    - число N - самый большой размер, у которого обе стороны не больше N пикселей
+      (если такого нет, самый маленький);
+    - буква типа (например, “x” или “z”) - размер этого типа, а если его нет, самый большой.
+    :param sizes: список размеров фотографии из ответа API VK.
+    :param strategy: (по умолчанию “largest”) стратегия выбора.
+    :return: словарь выбранного размера (type, url, width, height).
+    """
+    def area(size: dict) -> tuple:
+        return size.get("width", 0) * size.get("height", 0), VK_SIZE_TYPES.find(size["type"])
+
+    if isinstance(strategy, int):
+        fitting = [size for size in sizes if 0 < max(size.get("width", 0), size.get("height", 0)) <= strategy]
+        return max(fitting, key=area) if fitting else min(sizes, key=area)
+    if strategy != "largest":
+        for size in sizes:
+            if size["type"] == strategy:
+                return size
+    return max(sizes, key=area)
+
+
+class Metrics:
+    """
+    Сбор метрик HTTP-запросов: количество, время ответа с гистограммой, повторы, ошибки
+    и переданные байты по каждому эндпоинту. Подключается к сессии requests как обработчик ответа
+    (см. create_session), общий для всех потоков. В конце работы метрики выгружаются в JSON.
+    """
+    BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self) -> None:
+        """
+        Инициализирует пустой набор метрик и запоминает время начала.
+        """
+        self.endpoints = {}
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+
+    @staticmethod
+    def endpoint(method: str, url: str) -> str:
+        """
+        Формирует имя эндпоинта для группировки запросов: метод API VK, путь API Яндекс.Диска
+        (без ID операции) или “download”/“upload” для скачивания фото и загрузки по прямой ссылке.
+        :param method: HTTP-метод.
+        :param url: адрес запроса.
+        :return: имя эндпоинта.
+        """
+        path = urlsplit(url).path
+        if "/method/" in path:
+            return "vk " + path.rsplit("/", 1)[-1]
+        if "/v1/disk/" in path:
+            if "/operations/" in path:
+                path = path.split("/operations/")[0] + "/operations"
+            return f"yd {method} {path.split('/v1/disk', 1)[1]}"
+        return "download" if method == "GET" else "upload"
+
+    def record(self, endpoint: str, seconds: float, sent: int = 0, received: int = 0,
+               retries: int = 0, error: bool = False) -> None:
+        """
+        Добавляет один запрос в статистику эндпоинта.
+        :param endpoint: имя эндпоинта.
+        :param seconds: время ответа в секундах.
+        :param sent: количество отправленных байт.
+        :param received: количество полученных байт.
+        :param retries: количество повторов, сделанных для этого запроса.
+        :param error: завершился ли запрос ошибкой.
+        """
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = {
+                    "count": 0, "errors": 0, "retries": 0, "seconds": 0.0, "max": 0.0,
+                    "sent": 0, "received": 0, "histogram": [0] * (len(self.BUCKETS) + 1),
+                }
+            stats["count"] += 1
+            stats["errors"] += error
+            stats["retries"] += retries
+            stats["seconds"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            stats["sent"] += sent
+            stats["received"] += received
+            stats["histogram"][next((i for i, bound in enumerate(self.BUCKETS) if seconds <= bound), -1)] += 1
+
+    def add_retry(self, endpoint: str) -> None:
+        """
+        Учитывает повтор, сделанный на уровне приложения (например, при ошибке VK “слишком много запросов”).
+        :param endpoint: имя эндпоинта.
+        """
+        with self.lock:
+            if endpoint in self.endpoints:
+                self.endpoints[endpoint]["retries"] += 1
+
+    def hook(self, response: requests.Response, *args, **kwargs) -> None:
+        """
+        Обработчик ответа для сессии requests: записывает время до получения заголовков,
+        размер запроса и ответа (по Content-Length) и количество повторов urllib3.
+        """
+        request = response.request
+        retries = getattr(response.raw, "retries", None)
+        body = request.body
+        self.record(
+            self.endpoint(request.method, request.url),
+            response.elapsed.total_seconds(),
+            sent=int(request.headers.get("Content-Length") or 0) if body is not None else 0,
+            received=int(response.headers.get("Content-Length") or 0),
+            retries=len(retries.history) if retries is not None else 0,
+            error=response.status_code >= 400,
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Формирует сводку метрик: по каждому эндпоинту количество, ошибки, повторы, среднее и
+        максимальное время, байты и гистограмма времени ответа с верхними границами корзин.
+        :return: словарь с метриками.
+        """
+        with self.lock:
+            endpoints = {}
+            for endpoint, stats in sorted(self.endpoints.items()):
+                endpoints[endpoint] = {
+                    **stats,
+                    "avg": round(stats["seconds"] / stats["count"], 4),
+                    "seconds": round(stats["seconds"], 4),
+                    "max": round(stats["max"], 4),
+                    "histogram": dict(zip([str(bound) for bound in self.BUCKETS] + ["inf"], stats["histogram"])),
+                }
+        return {"elapsed": round(time.monotonic() - self.started, 3), "endpoints": endpoints}
+
+    def dump(self, path: str) -> None:
+        """
+        Сохраняет метрики в JSON-файл.
+        :param path: путь к файлу.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+def create_session(pool_size: int = 10, retries: int = 5, backoff: float = 0.5,
+                   metrics: Metrics = None) -> requests.Session:
+    """
+    Создает сессию requests с пулом постоянных (keep-alive) соединений и политикой повторов.
+    Запросы, завершившиеся кодом 429 или 5xx, а также ошибками соединения, повторяются
+    с экспоненциальной задержкой и случайным разбросом (jitter). Заголовок Retry-After учитывается.
+    Повторяются и POST-запросы: повтор загрузки по ссылке, первая попытка которой уже принята,
+    получает 409, и YD.upload_photo считает такой ответ успехом.
+    :param pool_size: (по умолчанию 10) размер пула соединений к одному хосту.
+    :param retries: (по умолчанию 5) максимальное количество повторов запроса.
+    :param backoff: (по умолчанию 0.5) базовая задержка между повторами в секундах.
+    :param metrics: (необязательно) экземпляр Metrics для сбора метрик запросов.
+    :return: настроенная сессия requests.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        backoff_jitter=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if metrics is not None:
+        session.hooks["response"].append(metrics.hook)
+    return session
 
 
 class VK:
     """
     Класс взаимодействия API VK.
     """
-    def __init__(self, token: str, version: str = "5.199") -> None:
+    def __init__(self, token: str, version: str = "5.199", pool_size: int = 10,
+                 retries: int = 5, backoff: float = 0.5, limiter: TokenBucket = None,
+                 metrics: Metrics = None) -> None:
         """
         Инициализирует экземпляр класса VK с заданными параметрами токена и версии API.
-        Устанавливает параметры для запросов к API и базовый URL.
+        Устанавливает параметры для запросов к API, базовый URL и сессию с пулом соединений.
         :param token: токен доступа к API ВКонтакте.
         :param version: (по умолчанию “5.199”) версия API ВКонтакте.
+        :param pool_size: (по умолчанию 10) размер пула соединений.
+        :param retries: (по умолчанию 5) количество повторов при ошибках 429/5xx и ошибке VK “слишком много запросов”.
+        :param backoff: (по умолчанию 0.5) базовая задержка между повторами в секундах.
+        :param limiter: (необязательно) общий ограничитель частоты запросов к API VK.
+        :param metrics: (необязательно) экземпляр Metrics для сбора метрик запросов.
         """
         self.params = {
             "access_token": token,
             "v": version,
         }
-        self.base = 'https://api.vk.com/method/'
+        self.base = VK_API_URL
+        self.retries = retries
+        self.backoff = backoff
+        self.session = create_session(pool_size, retries, backoff, metrics)
+        self.limiter = limiter
+        self.metrics = metrics
+
+    def call_method(self, method: str, params: dict) -> dict:
+        """
+        Вызывает метод API ВКонтакте через сессию с пулом соединений.
+        Если VK отвечает ошибкой “слишком много запросов в секунду”, запрос повторяется
+        с экспоненциальной задержкой и случайным разбросом, но не более retries раз.
+        Перед каждым запросом забирает токен у ограничителя limiter, если он задан.
+        В случае остальных ошибок выбрасывает исключение с кодом ошибки и сообщением.
+        :param method: название метода API, например “photos.get”.
+        :param params: параметры метода.
+        :return: JSON-ответ от API.
+        """
+        params = {**params, **self.params}
+        for attempt in range(self.retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            response = self.session.get(f'{self.base}{method}', params=params)
+            json_from_vk = response.json()
+            if "error" not in json_from_vk:
+                return json_from_vk
+            error_code = json_from_vk["error"]["error_code"]
+            if error_code != VK_TOO_MANY_REQUESTS or attempt == self.retries:
+                break
+            if self.metrics is not None:
+                self.metrics.add_retry(f"vk {method}")
+            time.sleep(self.backoff * 2 ** attempt + random.uniform(0, self.backoff))
+        error_msg = json_from_vk["error"]["error_msg"]
+        raise ValueError(f"Произошла ошибка. Код ошибки: {error_code} {error_msg}.")
 
     def get_photo(self, user_id: str, count: int = 5, album_id: str = "profile") -> dict:
         """
-        Отправляет запрос к API ВКонтакте для получения фотографий пользователя.
+        Отправляет запрос к API ВКонтакте для получения фотографий пользователя с помощью метода call_method.
         Проверяет ответ на наличие ошибок и возвращает JSON-ответ от API.
         В случае ошибки выбрасывает исключение с кодом ошибки и сообщением.
         :param user_id: ID пользователя ВКонтакте.
@@ -38,43 +308,106 @@ class VK:
         :param album_id: (по умолчанию “profile”) ID альбома, из которого загружаются фотографии.
         :return: JSON с информацией по фото.
         """
-        url = f'{self.base}photos.get'
         params = {
             'owner_id': user_id,
             'count': count,
             'album_id': album_id,
             'extended': 1
         }
-        params.update(self.params)
-        response = requests.get(url, params=params)
-        json_from_vk = response.json()
-        if "error" in json_from_vk:
-            error_code = json_from_vk["error"]["error_code"]
-            error_msg = json_from_vk["error"]["error_msg"]
-            raise ValueError(f"Произошла ошибка. Код ошибки: {error_code} {error_msg}.")
-        return json_from_vk
+        return self.call_method('photos.get', params)
+
+    def iter_photo(self, user_id: str, count: int = None, album_id: str = "profile",
+                   page_size: int = VK_PHOTOS_PAGE_SIZE) -> Iterator[dict]:
+        """
+        Постранично получает фотографии пользователя, сдвигая offset, и отдает их по одной по мере получения.
+        Следующая страница запрашивается только после того, как обработаны фотографии текущей,
+        поэтому в памяти одновременно находится не больше одной страницы.
+        :param user_id: ID пользователя ВКонтакте.
+        :param count: (по умолчанию все) количество фотографий для загрузки.
+        :param album_id: (по умолчанию “profile”) ID альбома, из которого загружаются фотографии.
+        :param page_size: (по умолчанию 1000) количество фотографий в одном запросе.
+        :return: генератор словарей с информацией о фотографиях из ответа photos.get.
+        """
+        offset = 0
+        while count is None or offset < count:
+            limit = page_size if count is None else min(page_size, count - offset)
+            response = self.call_method('photos.get', {
+                'owner_id': user_id,
+                'count': limit,
+                'offset': offset,
+                'album_id': album_id,
+                'extended': 1
+            })["response"]
+            yield from response["items"]
+            offset += len(response["items"])
+            if not response["items"] or offset >= response["count"]:
+                break
+
+    def get_photo_batch(self, targets: list, count: int = 5) -> dict:
+        """
+        Получает фотографии сразу для нескольких пар (пользователь, альбом), упаковывая
+        до 25 вызовов photos.get в один запрос к методу execute.
+        Ошибка отдельного вызова не прерывает остальные: для такой пары возвращается
+        словарь с ключом “error”, как в ответе photos.get.
+        :param targets: список пар (ID пользователя, ID альбома).
+        :param count: (по умолчанию 5) количество фотографий для каждой пары, не больше 1000.
+        :return: словарь {(ID пользователя, ID альбома): JSON с информацией по фото}.
+        """
+        result = {}
+        for start in range(0, len(targets), VK_EXECUTE_LIMIT):
+            chunk = targets[start:start + VK_EXECUTE_LIMIT]
+            calls = ", ".join(
+                "API.photos.get(" + json.dumps({
+                    "owner_id": int(user_id),
+                    "album_id": album_id,
+                    "count": min(count, VK_PHOTOS_PAGE_SIZE),
+                    "extended": 1
+                }) + ")"
+                for user_id, album_id in chunk
+            )
+            json_from_vk = self.call_method('execute', {'code': f"return [{calls}];"})
+            errors = iter(json_from_vk.get("execute_errors", []))
+            for target, response in zip(chunk, json_from_vk["response"]):
+                if response is False:
+                    result[target] = {"error": next(errors, {"error_code": 0, "error_msg": "Неизвестная ошибка"})}
+                else:
+                    result[target] = {"response": response}
+        return result
 
 
 class Photo:
     """
     Класс для обработки JSON результата запроса VK.
     """
-    def __init__(self, json_from_vk: dict) -> None:
+    def __init__(self, json_from_vk: dict = None, names: set = None, size="largest",
+                 lock: threading.Lock = None, manifest: "Manifest" = None) -> None:
         """
         Инициализирует экземпляр класса Photo с переданным JSON-ответом от API ВКонтакте.
         Сохраняет ответ в атрибуте json_from_vk и инициализирует пустой список result
         для хранения информации о фотографиях.
-        :param json_from_vk: JSON-ответ от API VK
+        Индекс имен names не копируется: несколько экземпляров Photo, загружающих в одну папку,
+        могут использовать общее множество, чтобы не выдавать одинаковые имена.
+        :param json_from_vk: (необязательно) JSON-ответ от API VK, не нужен при использовании iter_photo_info.
+        :param names: (необязательно) множество имен, уже занятых в папке назначения, например из YD.get_names.
+        :param size: (по умолчанию “largest”) стратегия выбора размера фотографии, см. select_size.
+        :param lock: (необязательно) блокировка индекса names, если его одновременно используют
+        экземпляры Photo из разных потоков.
+        :param manifest: (необязательно) журнал загрузок: уже записанные в нем фотографии помечаются
+        ключом “skipped”, и имя для них не подбирается.
         """
         self.json_from_vk = json_from_vk
         self.result = []
+        self.names = names if names is not None else set()
+        self.size = size
+        self.lock = lock if lock is not None else threading.Lock()
+        self.manifest = manifest
 
     def get_photo_info(self) -> list:
         """
         Извлекает информацию о фотографиях из JSON-ответа и сохраняет её в атрибуте result.
         Проверяет наличие фотографий в ответе; если фотографий нет, выбрасывает исключение ValueError.
         Возвращает список с информацией о каждой фотографии:
-        - название (количество лайков);
+        - название (количество лайков, при совпадении дополняется датой и ID фотографии);
         - размер файла;
         - URL.
         :return: список словарей с информацией о каждой фотографии.
@@ -82,61 +415,387 @@ class Photo:
         if self.json_from_vk["response"]["count"] == 0:
             raise ValueError("Ошибка. Фото отсутвует.")
         for photo in self.json_from_vk["response"]["items"]:
-            info = {
-                "file_name": photo["likes"]["count"],
-                "size": photo["sizes"][-1]["type"],
-                "url": photo["sizes"][-1]["url"]
-            }
-            self.result.append(info)
+            self.result.append(self.make_info(photo))
         return self.result
 
+    def iter_photo_info(self, photos: Iterable[dict]) -> Iterator[dict]:
+        """
+        Потоковый вариант get_photo_info: преобразует фотографии по мере их поступления,
+        например из VK.iter_photo, и сразу отдает информацию о каждой, сохраняя её в атрибуте result.
+        Если фотографий не оказалось, выбрасывает исключение ValueError.
+        :param photos: итерируемый объект со словарями фотографий из ответа API VK.
+        :return: генератор словарей с информацией о каждой фотографии.
+        """
+        empty = True
+        for photo in photos:
+            empty = False
+            info = self.make_info(photo)
+            self.result.append(info)
+            yield info
+        if empty:
+            raise ValueError("Ошибка. Фото отсутвует.")
+
+    def make_info(self, photo: dict) -> dict:
+        """
+        Формирует информацию об одной фотографии: уникальное название (см. make_name),
+        размер файла и URL по стратегии size (см. select_size),
+        а также ID фотографии, владельца и альбома для журнала загрузок.
+        Фотография, уже записанная в журнал manifest, возвращается только с ID и ключом “skipped”:
+        имя не резервируется, а YD.add_photo её пропускает.
+        :param photo: словарь фотографии из ответа API VK.
+        :return: словарь с информацией о фотографии.
+        """
+        if self.manifest is not None and photo in self.manifest:
+            return {"id": photo["id"], "owner_id": photo["owner_id"], "album_id": photo["album_id"], "skipped": True}
+        size = select_size(photo["sizes"], self.size)
+        return {
+            "file_name": self.make_name(photo),
+            "size": size["type"],
+            "url": size["url"],
+            "id": photo["id"],
+            "owner_id": photo["owner_id"],
+            "album_id": photo["album_id"]
+        }
+
+    def make_name(self, photo: dict) -> str:
+        """
+        Подбирает имя файла, которого еще нет в индексе names, и добавляет его в индекс.
+        Варианты проверяются по порядку: количество лайков, затем лайки и дата загрузки,
+        затем лайки, дата и ID фотографии (последний вариант уникален в пределах владельца).
+        Если заняты и они (например, файлами, загруженными в папку ранее), к последнему варианту
+        добавляется счетчик: “_1”, “_2” и так далее до первого свободного имени.
+        :param photo: словарь фотографии из ответа API VK.
+        :return: имя файла.
+        """
+        likes = photo["likes"]["count"]
+        date = datetime.fromtimestamp(photo["date"]).strftime("%Y-%m-%d")
+        with self.lock:
+            for name in (str(likes), f"{likes}_{date}", f"{likes}_{date}_{photo['id']}"):
+                if name not in self.names:
+                    break
+            else:
+                number = itertools.count(1)
+                while name in self.names:
+                    name = f"{likes}_{date}_{photo['id']}_{next(number)}"
+            self.names.add(name)
+        return name
+
+
+class Manifest:
+    """
+    Журнал загруженных фотографий в формате JSON Lines (одна строка на фотографию).
+    Записи только дописываются в конец файла, поэтому после сбоя журнал остается целым,
+    а повторный запуск пропускает уже загруженные фотографии и продолжает с места остановки.
+    """
+    def __init__(self, path: str = MANIFEST_FILE) -> None:
+        """
+        Инициализирует экземпляр класса Manifest: читает существующий журнал в множества ключей
+        и хешей содержимого и открывает файл на дозапись. Недописанная при сбое последняя строка пропускается.
+        :param path: (по умолчанию “manifest.jsonl”) путь к файлу журнала.
+        """
+        self.path = path
+        self.keys = set()
+        self.hashes = set()
+        line = "\n"
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self.keys.add(self.key(record))
+                    except (ValueError, KeyError):
+                        continue
+                    if "hash" in record:
+                        self.hashes.add(record["hash"])
+        self.file = open(path, "a", encoding="utf-8")
+        if not line.endswith("\n"):
+            self.file.write("\n")
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(photo: dict) -> str:
+        """
+        Формирует ключ фотографии из ID владельца, альбома и самой фотографии.
+        :param photo: словарь с информацией о фотографии.
+        :return: ключ вида “owner_album_id”.
+        """
+        return f"{photo['owner_id']}_{photo['album_id']}_{photo['id']}"
+
+    def __contains__(self, photo: dict) -> bool:
+        return "id" in photo and self.key(photo) in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, photo: dict) -> None:
+        """
+        Дописывает фотографию в журнал и сразу сбрасывает буфер на диск.
+        :param photo: словарь с информацией о фотографии.
+        """
+        if "id" not in photo:
+            return
+        record = {key: photo[key] for key in ("owner_id", "album_id", "id", "file_name")}
+        if "hash" in photo:
+            record["hash"] = photo["hash"]
+        with self.lock:
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.file.flush()
+            self.keys.add(self.key(photo))
+            if "hash" in photo:
+                self.hashes.add(photo["hash"])
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "Manifest":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
 
 class YD:
     """
     Этот класс отвечает за взаимодействие с API Яндекс.Диска для управления папками и загрузки фотографий.
     """
-    def __init__(self, token: str, folder_name: str = "VK photo") -> None:
+    def __init__(self, token: str, folder_name: str = "VK photo", pool_size: int = 10,
+                 retries: int = 5, backoff: float = 0.5, limiter: TokenBucket = None,
+                 metrics: Metrics = None, session: requests.Session = None) -> None:
         """
         Инициализирует экземпляр класса YD с заданными параметрами токена и имени папки.
-        Устанавливает заголовки для запросов и базовый URL для работы с API Яндекс.Диска.
+        Устанавливает заголовки для запросов, базовый URL для работы с API Яндекс.Диска
+        и сессию с пулом соединений, общую для всех потоков загрузки.
         :param token: токен авторизации для доступа к API Яндекс.Диска.
         :param folder_name: имя папки (по умолчанию “VK photo”).
+        :param pool_size: (по умолчанию 10) размер пула соединений, имеет смысл делать не меньше числа потоков загрузки.
+        :param retries: (по умолчанию 5) количество повторов при ответах 429/5xx и ошибках соединения.
+        :param backoff: (по умолчанию 0.5) базовая задержка между повторами в секундах.
+        :param limiter: (необязательно) общий ограничитель частоты запросов к API Яндекс.Диска.
+        :param metrics: (необязательно) экземпляр Metrics для сбора метрик запросов.
+        :param session: (необязательно) сессия другого экземпляра YD с тем же токеном, чтобы экземпляры
+        для разных папок использовали общий пул соединений; pool_size, retries, backoff и metrics тогда не нужны.
         """
         self.headers = {
             'Authorization': token
         }
-        self.base_url = "https://cloud-api.yandex.net/v1/disk/resources"
+        self.base_url = YD_API_URL
         self.folder_name = folder_name
+        if session is None:
+            session = create_session(pool_size, retries, backoff, metrics)
+            session.headers.update(self.headers)
+        self.session = session
+        self.hashes = set()
+        self.originals = {}
+        self.lock = threading.Lock()
+        self.limiter = limiter
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Выполняет запрос к API Яндекс.Диска через сессию, предварительно забирая токен
+        у ограничителя limiter, если он задан.
+        :param method: HTTP-метод.
+        :param url: адрес запроса.
+        :param kwargs: остальные параметры requests.
+        :return: объект ответа.
+        """
+        if self.limiter is not None:
+            self.limiter.acquire()
+        return self.session.request(method, url, **kwargs)
 
     def add_folder(self) -> None:
         """
         Яндекс.Диске с использованием указанного пути.
-        Использует метод requests.put для выполнения HTTP-запроса.
+        Использует метод request для выполнения HTTP-запроса.
         Вызывает метод response_validate для проверки статуса ответа.
         """
         params = {
             "path": self.folder_name
         }
-        response = requests.put(self.base_url, params=params, headers=self.headers)
+        response = self.request("PUT", self.base_url, params=params)
         self.response_validate(response, "folder")
 
-    def add_photo(self, json_photo_info: list) -> None:
+    def get_names(self, page_size: int = 1000) -> set:
+        """
+        Получает имена всех файлов в папке постраничным запросом GET /resources,
+        чтобы проверять занятость имен локально, а не отдельным запросом на каждый файл.
+        Если папки еще нет, возвращает пустое множество.
+        :param page_size: (по умолчанию 1000) количество элементов на странице.
+        :return: множество имен файлов в папке.
+        """
+        names = set()
+        offset = 0
+        while True:
+            params = {
+                "path": self.folder_name,
+                "fields": "_embedded.items.name,_embedded.total",
+                "limit": page_size,
+                "offset": offset
+            }
+            response = self.request("GET", self.base_url, params=params)
+            if response.status_code == 404:
+                return names
+            if response.status_code not in range(200, 300):
+                raise ValueError(f"Не удалось получить список файлов! Код ошибки: {response.status_code}. "
+                                 f"{response.json()['message']}")
+            embedded = response.json()["_embedded"]
+            names.update(item["name"] for item in embedded["items"])
+            offset += len(embedded["items"])
+            if not embedded["items"] or offset >= embedded["total"]:
+                return names
+
+    def add_photo(self, json_photo_info: Iterable[dict], workers: int = 5, total: int = None,
+                  manifest: Manifest = None, tracker: "OperationTracker" = None, local: bool = False,
+                  chunk_size: int = 1024 * 1024, progress: bool = True) -> None:
         """
         Загружает фотографии на Яндекс.Диск, используя информацию, полученную из JSON-ответа.
-        Использует tqdm для отображения прогресса загрузки.
-        Перебирает каждую фотографию в списке и отправляет POST-запрос с помощью requests.post.
+        Загрузка выполняется параллельно в пуле потоков, не более workers запросов одновременно.
+        Принимает как список, так и генератор (например, Photo.iter_photo_info): новые фотографии
+        берутся из него только по мере освобождения потоков, поэтому загрузка начинается
+        до окончания получения списка фотографий, а в памяти не накапливается очередь задач.
+        Использует tqdm для отображения прогресса загрузки, прогресс обновляется по мере завершения загрузок.
+        Ошибка загрузки одной фотографии не прерывает остальные: все ошибки собираются
+        и после завершения загрузки выбрасываются одним исключением ValueError.
+        Если исключение выбросил сам источник фотографий (например, ошибка VK при получении страницы),
+        новые загрузки не начинаются, но уже запущенные дожидаются завершения и записываются в журнал;
+        затем исключение источника выбрасывается повторно, а при ошибках загрузки - вместе с ними в ValueError.
+        Фотографии, помеченные ключом “skipped” (см. Photo.make_info), и, если передан журнал manifest,
+        уже записанные в нем фотографии пропускаются,
+        а каждая успешно загруженная дописывается в журнал. Если передан tracker, ссылки на операции загрузки
+        передаются ему для отслеживания статуса, и фотография попадает в журнал только когда tracker
+        сообщит об успехе операции: при статусе failed или timeout она будет загружена повторно.
+        В локальном режиме (local) фотографии скачиваются и загружаются через upload_photo_local,
+        повторы одинакового содержимого пропускаются.
+        :param json_photo_info: список или генератор с информацией о фотографиях, полученный из API ВКонтакте.
+        :param workers: (по умолчанию 5) максимальное количество одновременных загрузок.
+        :param total: (необязательно) ожидаемое количество фотографий для индикатора прогресса,
+        если json_photo_info не имеет длины.
+        :param manifest: (необязательно) журнал загруженных фотографий.
+        :param tracker: (необязательно) экземпляр OperationTracker для отслеживания операций загрузки.
+        :param local: (по умолчанию False) загружать через локальное скачивание с проверкой дубликатов.
+        :param chunk_size: (по умолчанию 1 МБ) размер блока при скачивании в локальном режиме.
+        :param progress: (по умолчанию True) показывать индикатор прогресса.
+        """
+        if workers < 1:
+            raise ValueError("Количество потоков загрузки должно быть больше нуля")
+        if total is None and hasattr(json_photo_info, "__len__"):
+            total = len(json_photo_info)
+        errors = []
+        uploaded = 0
+        skipped = 0
+        source_error = None
+        if local and manifest is not None:
+            self.hashes |= manifest.hashes
+        with tqdm(total=total, desc="Загрузка фото на Яндекс.Диск", disable=not progress) as pbar:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                running = {}
+                photos = iter(json_photo_info)
+                while True:
+                    try:
+                        for photo in photos:
+                            if photo.get("skipped") or manifest is not None and photo in manifest:
+                                skipped += 1
+                                pbar.set_postfix(skipped=skipped)
+                                pbar.update()
+                                continue
+                            if local:
+                                running[executor.submit(self.upload_photo_local, photo, chunk_size)] = photo
+                            else:
+                                running[executor.submit(self.upload_photo, photo)] = photo
+                            if len(running) >= workers:
+                                break
+                    except Exception as error:
+                        source_error = error
+                        photos = iter(())
+                    if not running:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        photo = running.pop(future)
+                        try:
+                            href = future.result()
+                        except (ValueError, requests.RequestException) as message:
+                            errors.append(f"{photo['file_name']}: {message}")
+                        else:
+                            if tracker is not None and href:
+                                on_success = None if manifest is None else functools.partial(manifest.add, photo)
+                                tracker.track(f"{self.folder_name}/{photo['file_name']}", href, on_success)
+                            elif manifest is not None:
+                                manifest.add(photo)
+                            if photo.get("duplicate"):
+                                skipped += 1
+                                pbar.set_postfix(skipped=skipped)
+                        uploaded += 1
+                        pbar.update()
+        if source_error is not None and not errors:
+            raise source_error
+        if errors:
+            message = f"Не удалось загрузить {len(errors)} из {uploaded} фото:\n" + "\n".join(errors)
+            if source_error is not None:
+                raise ValueError(f"{source_error}\n{message}") from source_error
+            raise ValueError(message)
+
+    def upload_photo(self, photo: dict) -> str:
+        """
+        Отправляет POST-запрос на загрузку одной фотографии по URL через сессию с пулом соединений.
         Вызывает метод response_validate для проверки статуса ответа.
-        :param json_photo_info: список с информацией о фотографиях, полученный из API ВКонтакте.
+        Яндекс.Диск только ставит скачивание в очередь и возвращает ссылку на операцию,
+        за её выполнением следит OperationTracker.
+        Если запрос повторялся (create_session) и повтор получил 409, значит одна из предыдущих попыток
+        уже поставила загрузку в очередь: это успех, но ссылки на операцию нет.
+        :param photo: словарь с информацией о фотографии (file_name, url).
+        :return: ссылка на операцию загрузки или None, если API её не вернул.
         """
-        with tqdm(total=len(json_photo_info), desc="Загрузка фото на Яндекс.Диск") as pbar:
-            for photo in json_photo_info:
-                params = {
-                    "path": f"{self.folder_name}/{photo['file_name']}",
-                    "url": photo["url"]
-                }
-                response = requests.post(self.base_url + "/upload", params=params, headers=self.headers)
+        params = {
+            "path": f"{self.folder_name}/{photo['file_name']}",
+            "url": photo["url"]
+        }
+        response = self.request("POST", self.base_url + "/upload", params=params)
+        retries = getattr(response.raw, "retries", None)
+        if response.status_code == 409 and retries is not None and retries.history:
+            return None
+        self.response_validate(response, "photo")
+        return response.json().get("href")
+
+    def upload_photo_local(self, photo: dict, chunk_size: int = 1024 * 1024) -> None:
+        """
+        Скачивает фотографию блоками по chunk_size во временный файл (до 8 МБ хранится в памяти),
+        одновременно считая хеш SHA-256 содержимого. Если такое содержимое уже загружалось
+        (в этом запуске или по журналу загрузок), фотография помечается ключом “duplicate” и не загружается,
+        а в ключ “original” записывается путь на Яндекс.Диске, по которому это содержимое загружено
+        в текущем запуске (None, если оно известно только по журналу загрузок).
+        Иначе получает ссылку для загрузки (GET /resources/upload) и отправляет файл по ней PUT-запросом.
+        Хеш сохраняется в ключе “hash” словаря фотографии для записи в журнал.
+        :param photo: словарь с информацией о фотографии (file_name, url).
+        :param chunk_size: (по умолчанию 1 МБ) размер блока при скачивании.
+        """
+        digest = hashlib.sha256()
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as buffer:
+            with self.session.get(photo["url"], stream=True, headers={"Authorization": None}) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size):
+                    digest.update(chunk)
+                    buffer.write(chunk)
+            photo["hash"] = digest.hexdigest()
+            with self.lock:
+                if photo["hash"] in self.hashes:
+                    photo["duplicate"] = True
+                    photo["original"] = self.originals.get(photo["hash"])
+                    return
+                self.hashes.add(photo["hash"])
+                self.originals[photo["hash"]] = f"{self.folder_name}/{photo['file_name']}"
+            try:
+                params = {"path": f"{self.folder_name}/{photo['file_name']}"}
+                response = self.request("GET", self.base_url + "/upload", params=params)
                 self.response_validate(response, "photo")
-                pbar.update()
+                buffer.seek(0)
+                response = self.session.put(response.json()["href"], data=buffer, headers={"Authorization": None})
+                if response.status_code not in range(200, 300):
+                    raise ValueError(f"Не удалось загрузить фото! Код ошибки: {response.status_code}.")
+            except (ValueError, requests.RequestException):
+                with self.lock:
+                    self.hashes.discard(photo["hash"])
+                    self.originals.pop(photo["hash"], None)
+                raise
 
     def response_validate(self, response, type: str) -> None:
         """
@@ -155,17 +814,294 @@ class YD:
                 raise ValueError(f"Не удалось загрузить фото! Код ошибки: {status}. {response_json["message"]}")
 
 
+class OperationTracker:
+    """
+    Отслеживает асинхронные операции загрузки Яндекс.Диска (ответ 202 на POST /resources/upload).
+    Все операции опрашиваются одним планировщиком: очередь с приоритетом по времени следующего опроса
+    и небольшой пул потоков для самих запросов, поэтому тысячи операций не требуют потока на каждую.
+    Интервал опроса каждой операции растет экспоненциально от min_interval до max_interval,
+    а при большом количестве операций в работе растягивается так, чтобы суммарно
+    выполнялось не больше max_rate опросов в секунду.
+    """
+    def __init__(self, yd: "YD", workers: int = 4, min_interval: float = 0.5, max_interval: float = 10.0,
+                 max_rate: float = 20.0, timeout: float = 300.0, fetch_size: bool = True) -> None:
+        """
+        Инициализирует экземпляр класса OperationTracker и запускает поток планировщика.
+        :param yd: экземпляр класса YD, через который выполняются запросы.
+        :param workers: (по умолчанию 4) количество потоков для одновременных опросов.
+        :param min_interval: (по умолчанию 0.5) минимальный интервал опроса в секундах.
+        :param max_interval: (по умолчанию 10) максимальный интервал опроса в секундах.
+        :param max_rate: (по умолчанию 20) максимальное суммарное количество опросов в секунду.
+        :param timeout: (по умолчанию 300) время в секундах, после которого операция считается зависшей.
+        :param fetch_size: (по умолчанию True) запрашивать размер загруженного файла для расчета скорости.
+        """
+        self.yd = yd
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_rate = max_rate
+        self.timeout = timeout
+        self.fetch_size = fetch_size
+        self.queue = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.pending = 0
+        self.closed = False
+        self.reports = []
+        self.started = time.monotonic()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.scheduler = threading.Thread(target=self.schedule, daemon=True)
+        self.scheduler.start()
+
+    def track(self, path: str, href: str, on_success: Callable[[], None] = None) -> None:
+        """
+        Добавляет операцию в очередь опроса.
+        :param path: путь к файлу на Яндекс.Диске.
+        :param href: ссылка на операцию из ответа API.
+        :param on_success: (необязательно) функция без аргументов, вызываемая после успешного завершения операции,
+        например запись фотографии в журнал загрузок.
+        """
+        now = time.monotonic()
+        with self.condition:
+            operation = {"path": path, "href": href, "started": now, "interval": self.min_interval, "polls": 0,
+                         "on_success": on_success}
+            self.pending += 1
+            heapq.heappush(self.queue, (now + self.delay(operation), next(self.counter), operation))
+            self.condition.notify()
+
+    def delay(self, operation: dict) -> float:
+        """
+        Вычисляет задержку до следующего опроса операции с учетом ограничения max_rate.
+        Вызывается под блокировкой condition.
+        :param operation: словарь с данными операции.
+        :return: задержка в секундах.
+        """
+        return max(operation["interval"], self.pending / self.max_rate)
+
+    def schedule(self) -> None:
+        """
+        Цикл планировщика: ждет наступления времени опроса ближайшей операции и передает её в пул потоков.
+        """
+        while True:
+            with self.condition:
+                while True:
+                    if self.closed and self.pending == 0:
+                        return
+                    now = time.monotonic()
+                    if self.queue and self.queue[0][0] <= now:
+                        break
+                    self.condition.wait(self.queue[0][0] - now if self.queue else None)
+                _, _, operation = heapq.heappop(self.queue)
+            self.executor.submit(self.poll, operation)
+
+    def poll(self, operation: dict) -> None:
+        """
+        Запрашивает статус операции. Завершенная операция попадает в отчет (для успешной сначала вызывается
+        on_success), незавершенная возвращается в очередь с удвоенным интервалом.
+        :param operation: словарь с данными операции.
+        """
+        operation["polls"] += 1
+        try:
+            status = self.yd.request("GET", operation["href"]).json().get("status", "in-progress")
+        except (ValueError, requests.RequestException):
+            status = "in-progress"
+        latency = time.monotonic() - operation["started"]
+        if status == "in-progress" and latency < self.timeout:
+            operation["interval"] = min(operation["interval"] * 2, self.max_interval)
+            with self.condition:
+                heapq.heappush(self.queue, (time.monotonic() + self.delay(operation), next(self.counter), operation))
+                self.condition.notify()
+            return
+        report = {
+            "path": operation["path"],
+            "status": status if status != "in-progress" else "timeout",
+            "latency": round(latency, 3),
+            "polls": operation["polls"],
+            "size": None,
+            "throughput": None,
+        }
+        if status == "success" and self.fetch_size:
+            try:
+                params = {"path": operation["path"], "fields": "size"}
+                size = self.yd.request("GET", self.yd.base_url, params=params).json().get("size")
+            except (ValueError, requests.RequestException):
+                size = None
+            if size is not None:
+                report["size"] = size
+                report["throughput"] = round(size / latency) if latency else None
+        try:
+            if report["status"] == "success" and operation["on_success"] is not None:
+                operation["on_success"]()
+        finally:
+            with self.condition:
+                self.reports.append(report)
+                self.pending -= 1
+                self.condition.notify_all()
+
+    def join(self) -> list:
+        """
+        Ждет завершения всех отслеживаемых операций и останавливает планировщик.
+        :return: список отчетов по каждой операции: путь, статус (success, failed или timeout),
+        время выполнения в секундах, количество опросов, размер файла и скорость в байтах в секунду.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+            self.condition.wait_for(lambda: self.pending == 0)
+        self.scheduler.join()
+        self.executor.shutdown()
+        return self.reports
+
+    def summary(self) -> dict:
+        """
+        Считает сводную статистику по завершенным операциям.
+        :return: словарь с количеством операций по статусам, средней и максимальной задержкой,
+        количеством файлов и байтов в секунду за всё время работы.
+        """
+        elapsed = time.monotonic() - self.started
+        latencies = [report["latency"] for report in self.reports]
+        statuses = {}
+        for report in self.reports:
+            statuses[report["status"]] = statuses.get(report["status"], 0) + 1
+        return {
+            "total": len(self.reports),
+            "statuses": statuses,
+            "latency_avg": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "latency_max": max(latencies, default=None),
+            "files_per_second": round(len(self.reports) / elapsed, 2) if elapsed else None,
+            "bytes_per_second": round(sum(report["size"] or 0 for report in self.reports) / elapsed) if elapsed else None,
+        }
+
+
+class JobRunner:
+    """
+    Неинтерактивный запуск заданий резервного копирования из файла.
+    Задания выполняются параллельно, а запросы к VK и Яндекс.Диску всех заданий проходят через
+    общие ограничители частоты (TokenBucket), поэтому процесс работает на максимально допустимой
+    скорости, не превышая лимиты API.
+    """
+    def __init__(self, vk_token: str, yd_token: str, workers: int = 4, upload_workers: int = 5,
+                 vk_rps: float = 3, yd_rps: float = 20, metrics: Metrics = None) -> None:
+        """
+        Инициализирует экземпляр класса JobRunner.
+        :param vk_token: токен доступа к API ВКонтакте.
+        :param yd_token: токен Яндекс.Диска.
+        :param workers: (по умолчанию 4) количество одновременно выполняемых заданий.
+        :param upload_workers: (по умолчанию 5) количество одновременных загрузок в одном задании.
+        :param vk_rps: (по умолчанию 3) лимит запросов к API VK в секунду на весь процесс.
+        :param yd_rps: (по умолчанию 20) лимит запросов к API Яндекс.Диска в секунду на весь процесс.
+        :param metrics: (необязательно) экземпляр Metrics для сбора метрик запросов.
+        """
+        self.yd_token = yd_token
+        self.metrics = metrics
+        self.workers = workers
+        self.upload_workers = upload_workers
+        self.yd_limiter = TokenBucket(yd_rps)
+        self.yd = None
+        self.tracker = None
+        self.folders = {}
+        self.lock = threading.Lock()
+        self.vk = VK(vk_token, pool_size=workers, limiter=TokenBucket(vk_rps), metrics=metrics)
+
+    @staticmethod
+    def read_jobs(path: str) -> list:
+        """
+        Читает файл заданий в формате JSON: список объектов с ключами
+        user_id (обязательно), album_id (по умолчанию “profile”), count (по умолчанию все фото),
+        folder (по умолчанию ID пользователя), size (по умолчанию “largest”).
+        :param path: путь к файлу заданий.
+        :return: список заданий с заполненными значениями по умолчанию.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            jobs = json.load(f)
+        if not isinstance(jobs, list):
+            raise ValueError("Файл заданий должен содержать список")
+        result = []
+        for number, job in enumerate(jobs, 1):
+            if "user_id" not in job:
+                raise ValueError(f"В задании {number} не указан user_id")
+            result.append({
+                "user_id": str(job["user_id"]),
+                "album_id": job.get("album_id", "profile"),
+                "count": job.get("count"),
+                "folder": job.get("folder", str(job["user_id"])),
+                "size": job.get("size", "largest"),
+            })
+        return result
+
+    def run_job(self, job: dict, manifest: Manifest, tracker: OperationTracker = None) -> str:
+        """
+        Выполняет одно задание: создает папку, получает фотографии постранично и загружает их.
+        Индекс имен папки общий для всех заданий с этой папкой (как folders в Interface.run_batch):
+        папка создается и её имена запрашиваются один раз, а имена выдаются под блокировкой папки,
+        поэтому одновременные задания не выбирают одинаковые имена файлов.
+        Запросы к Яндекс.Диску идут через общую сессию self.yd (keep-alive соединения всех заданий).
+        :param job: задание из read_jobs.
+        :param manifest: общий журнал загруженных фотографий.
+        :param tracker: (необязательно) общий OperationTracker для операций загрузки всех заданий.
+        :return: строка с результатом задания.
+        """
+        yd = YD(self.yd_token, job["folder"], limiter=self.yd_limiter, session=self.yd.session)
+        with self.lock:
+            folder = self.folders.setdefault(job["folder"], {"lock": threading.Lock(), "names": None})
+        with folder["lock"]:
+            if folder["names"] is None:
+                yd.add_folder()
+                folder["names"] = yd.get_names()
+        photo = Photo(names=folder["names"], size=job["size"], lock=folder["lock"], manifest=manifest)
+        photos = self.vk.iter_photo(job["user_id"], job["count"], job["album_id"])
+        yd.add_photo(photo.iter_photo_info(photos), workers=self.upload_workers, manifest=manifest, tracker=tracker,
+                     progress=False)
+        uploaded = sum(not info.get("duplicate") and not info.get("skipped") for info in photo.result)
+        return f"{job['user_id']}/{job['album_id']} -> {job['folder']}: {uploaded} фото"
+
+    def run(self, path: str) -> list:
+        """
+        Выполняет все задания из файла параллельно, не более workers одновременно.
+        Ошибка одного задания не прерывает остальные.
+        Операции загрузки всех заданий отслеживаются одним OperationTracker (атрибут tracker),
+        итог по ним выводится после завершения заданий. Все задания используют одну сессию Яндекс.Диска
+        (атрибут yd) с пулом на workers * upload_workers соединений, она закрывается в конце.
+        :param path: путь к файлу заданий.
+        :return: список строк с ошибками заданий (пустой, если ошибок нет).
+        """
+        jobs = self.read_jobs(path)
+        errors = []
+        self.folders = {}
+        self.yd = YD(self.yd_token, pool_size=self.workers * self.upload_workers, limiter=self.yd_limiter,
+                     metrics=self.metrics)
+        self.tracker = OperationTracker(self.yd)
+        with Manifest() as manifest:
+            try:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    futures = {executor.submit(self.run_job, job, manifest, self.tracker): job for job in jobs}
+                    with tqdm(total=len(jobs), desc="Выполнение заданий") as pbar:
+                        for future in as_completed(futures):
+                            job = futures[future]
+                            try:
+                                pbar.write(future.result())
+                            except (ValueError, requests.RequestException) as message:
+                                errors.append(f"{job['user_id']}/{job['album_id']}: {message}")
+                            pbar.update()
+            finally:
+                self.tracker.join()
+                self.yd.session.close()
+        print(Interface.get_operations_result(self.tracker))
+        return errors
+
+
 class Interface:
     """
     Класс отвечает за интерфейс взаимодействия с пользователем и исполнение программы.
     """
-    def __init__(self, vk_token: str) -> None:
+    def __init__(self, vk_token: str, metrics: Metrics = None) -> None:
         """
         Инициализирует экземпляр класса Interface с заданным токеном доступа к API ВКонтакте.
         Сохраняет токен в приватном атрибуте __vk_token.
         :param vk_token: токен доступа к API ВКонтакте.
+        :param metrics: (необязательно) экземпляр Metrics для сбора метрик запросов.
         """
         self.__vk_token = vk_token
+        self.metrics = metrics
 
     def run(self) -> None:
         """
@@ -175,9 +1111,12 @@ class Interface:
         2. Получает токен Яндекс.Диска.
         3. Получает ID альбома.
         4. Получает количество фотографий для загрузки.
-        5. Создает экземпляры классов VK и Photo, загружает фотографии.
-        6. Использует экземпляр класса YD для добавления папки и загрузки фотографий на Яндекс.Диск.
-        7. Отображает результаты и сообщения об ошибках.
+        5. Создает экземпляры классов VK и Photo, получает фотографии постранично.
+        6. Использует экземпляр класса YD для добавления папки и загрузки фотографий на Яндекс.Диск,
+        загрузка идет параллельно с получением списка фотографий. Фотографии, уже записанные
+        в журнал загрузок (Manifest), пропускаются.
+        7. Дожидается завершения операций загрузки на стороне Яндекс.Диска (OperationTracker).
+        8. Отображает результаты и сообщения об ошибках.
         """
         user_id = self.set_user_id()
         yd_token = self.set_yd_token()
@@ -185,28 +1124,122 @@ class Interface:
         count = self.set_count()
 
         try:
-            vk = VK(self.__vk_token)
-            photo = Photo(vk.get_photo(user_id, count, album_id))
-
-            yd = YD(yd_token, user_id)
+            vk = VK(self.__vk_token, metrics=self.metrics)
+            yd = YD(yd_token, user_id, metrics=self.metrics)
             yd.add_folder()
-            yd.add_photo(photo.get_photo_info())
+            tracker = OperationTracker(yd)
+            with Manifest() as manifest:
+                photo = Photo(names=yd.get_names(), manifest=manifest)
+                try:
+                    yd.add_photo(photo.iter_photo_info(vk.iter_photo(user_id, count, album_id)), total=count,
+                                 manifest=manifest, tracker=tracker)
+                finally:
+                    tracker.join()
 
             print("\nЗагрузка завершена успешно.")
             print("На ваш яндекс диск добавлены файлы:")
             print(self.get_result(photo))
+            print(self.get_operations_result(tracker))
 
         except ValueError as message:
             print("\n\t*** ERROR ***")
             print(message)
 
+    def run_batch(self, user_ids: list, album_ids: list, yd_token: str, count: int = 5,
+                  size="largest", local: bool = False) -> None:
+        """
+        Неинтерактивный режим: загружает фотографии для всех сочетаний пользователей и альбомов.
+        Список фотографий запрашивается пачками через VK.get_photo_batch (до 25 пар пользователь/альбом
+        за один запрос), фотографии каждого пользователя загружаются в папку с его ID на Яндекс.Диске.
+        Ошибка по одному пользователю или альбому не прерывает обработку остальных,
+        все ошибки выводятся в конце. Уже загруженные фотографии пропускаются по журналу загрузок.
+        Операции загрузки всех пользователей отслеживаются одним OperationTracker, итог выводится в конце.
+        :param user_ids: список ID пользователей ВКонтакте.
+        :param album_ids: список ID альбомов.
+        :param yd_token: токен Яндекс.Диска.
+        :param count: (по умолчанию 5) количество фотографий из каждого альбома.
+        :param size: (по умолчанию “largest”) стратегия выбора размера фотографии, см. select_size.
+        :param local: (по умолчанию False) загружать через локальное скачивание с проверкой дубликатов.
+        """
+        vk = VK(self.__vk_token, metrics=self.metrics)
+        yd = YD(yd_token, metrics=self.metrics)
+        targets = [(user_id, album_id) for user_id in user_ids for album_id in album_ids]
+        folders = {}
+        errors = []
+        manifest = Manifest()
+        tracker = OperationTracker(yd)
+        try:
+            for start in range(0, len(targets), VK_EXECUTE_LIMIT):
+                chunk = targets[start:start + VK_EXECUTE_LIMIT]
+                try:
+                    photos = vk.get_photo_batch(chunk, count)
+                except ValueError as message:
+                    errors.extend(f"{user_id}/{album_id}: {message}" for user_id, album_id in chunk)
+                    continue
+                for (user_id, album_id), json_from_vk in photos.items():
+                    try:
+                        if "error" in json_from_vk:
+                            error = json_from_vk["error"]
+                            raise ValueError(f"Произошла ошибка. Код ошибки: {error['error_code']} {error['error_msg']}.")
+                        yd.folder_name = user_id
+                        if user_id not in folders:
+                            yd.add_folder()
+                            folders[user_id] = yd.get_names()
+                        photo = Photo(json_from_vk, folders[user_id], size, manifest=manifest)
+                        yd.add_photo(photo.get_photo_info(), manifest=manifest, tracker=tracker, local=local)
+                        print(f"\n{user_id}/{album_id}: {self.get_result(photo)}")
+                    except ValueError as message:
+                        errors.append(f"{user_id}/{album_id}: {message}")
+        finally:
+            tracker.join()
+            manifest.close()
+
+        print(f"\nОбработано альбомов: {len(targets)}, с ошибками: {len(errors)}.")
+        print(self.get_operations_result(tracker))
+        if errors:
+            print("\n\t*** ERROR ***")
+            print("\n".join(errors))
+
     def get_result(self, photo: Photo) -> str:
         """
         Форматирует и объединяет имена файлов загруженных фотографий, возвращая их в виде строки, разделенной запятыми.
+        Фотографии, пропущенные как дубликаты в локальном режиме, в список не входят
+        и перечисляются отдельно с путем, по которому загружено такое же содержимое.
+        Фотографии, пропущенные по журналу загрузок (ключ “skipped”), тоже не входят в список, выводится их количество.
         :param photo: экземпляр класса Photo, содержащий информацию о фотографиях.
         :return: строка с именами файлов.
         """
-        return ", ".join([str(d["file_name"]) for d in photo.result])
+        uploaded = [d for d in photo.result if not d.get("duplicate") and not d.get("skipped")]
+        result = ", ".join([str(d["file_name"]) for d in uploaded])
+        duplicates = [
+            f"{d['file_name']} (= {d.get('original') or 'загружено ранее'})" for d in photo.result if d.get("duplicate")
+        ]
+        if duplicates:
+            result = (result or "новых файлов нет") + "\nПропущены дубликаты: " + ", ".join(duplicates)
+        skipped = sum(1 for d in photo.result if d.get("skipped"))
+        if skipped:
+            result = (result or "новых файлов нет") + f"\nПропущено загруженных ранее (по журналу): {skipped}"
+        return result
+
+    @staticmethod
+    def get_operations_result(tracker: OperationTracker) -> str:
+        """
+        Форматирует итог выполнения операций загрузки на Яндекс.Диске: статусы, задержку, скорость
+        и список файлов, которые не удалось загрузить.
+        :param tracker: экземпляр класса OperationTracker после вызова join.
+        :return: строка с результатами.
+        """
+        summary = tracker.summary()
+        statuses = ", ".join(f"{status}: {count}" for status, count in summary["statuses"].items())
+        lines = [
+            f"Операции загрузки: {summary['total']} ({statuses or 'нет'})",
+            f"Задержка: средняя {summary['latency_avg']} с, максимальная {summary['latency_max']} с",
+            f"Скорость: {summary['files_per_second']} файлов/с, {summary['bytes_per_second']} байт/с",
+        ]
+        failed = [report["path"] for report in tracker.reports if report["status"] != "success"]
+        if failed:
+            lines.append("Не загружены: " + ", ".join(failed))
+        return "\n".join(lines)
 
     def set_info(self, type: str, info: str, exception: str) -> str:
         """
@@ -283,9 +1316,84 @@ class Interface:
             print("Некорректный ввод, выбрано значение по умолчанию.")
             return 5
 
+
+def read_vk_token(path: str = "settings.ini") -> str:
+    """
+    Читает токен ВКонтакте из файла настроек.
+    :param path: (по умолчанию settings.ini) путь до файла настроек.
+    :return: токен из секции [Tokens], ключ vk_token.
+    """
+    config = configparser.ConfigParser()
+    if not config.read(path, encoding="utf-8"):
+        raise FileNotFoundError(f"Файл настроек {path} не найден")
+    return config["Tokens"]["vk_token"]
+
+
+def main() -> None:
+    """
+    Точка входа. Без аргументов запускает интерактивный интерфейс,
+    с аргументами --users и --yd-token загружает фотографии без участия пользователя,
+    с аргументами --jobs и --yd-token выполняет задания из файла через JobRunner.
+    """
+    parser = argparse.ArgumentParser(description="Загрузка фотографий из ВКонтакте на Яндекс.Диск")
+    parser.add_argument("--users", nargs="+", help="ID пользователей ВКонтакте")
+    parser.add_argument("--albums", nargs="+", default=["profile"], help="ID альбомов (по умолчанию profile)")
+    parser.add_argument("--yd-token", help="токен Яндекс.Диска")
+    parser.add_argument("--count", type=int, default=5, help="количество фотографий из каждого альбома")
+    parser.add_argument("--size", default="largest",
+                        help="размер фото: largest, максимальная сторона в пикселях или тип VK (например, x)")
+    parser.add_argument("--local", action="store_true",
+                        help="скачивать фото локально и пропускать дубликаты по содержимому")
+    parser.add_argument("--jobs", help="JSON-файл с заданиями (user_id, album_id, count, folder, size)")
+    parser.add_argument("--workers", type=int, default=4, help="количество одновременно выполняемых заданий")
+    parser.add_argument("--vk-rps", type=float, default=3, help="лимит запросов к API VK в секунду")
+    parser.add_argument("--yd-rps", type=float, default=20, help="лимит запросов к API Яндекс.Диска в секунду")
+    parser.add_argument("--metrics", help="JSON-файл для сохранения метрик запросов по окончании работы")
+    parser.add_argument("--settings", default="settings.ini", help="файл настроек с токеном ВКонтакте")
+    args = parser.parse_args()
+    vk_token = read_vk_token(args.settings)
+    metrics = Metrics() if args.metrics else None
+    try:
+        dispatch(args, parser, vk_token, metrics)
+    finally:
+        if metrics is not None:
+            metrics.dump(args.metrics)
+
+
+def dispatch(args: argparse.Namespace, parser: argparse.ArgumentParser, vk_token: str,
+             metrics: Metrics = None) -> None:
+    """
+    Выбирает режим работы по аргументам командной строки и запускает его.
+    :param args: разобранные аргументы командной строки.
+    :param parser: парсер аргументов для вывода ошибок.
+    :param vk_token: токен доступа к API ВКонтакте.
+    :param metrics: (необязательно) экземпляр Metrics для сбора метрик запросов.
+    """
+    size = int(args.size) if args.size.isdigit() else args.size
+
+    if args.jobs:
+        if not args.yd_token:
+            parser.error("для выполнения заданий нужен --yd-token")
+        runner = JobRunner(vk_token, args.yd_token, args.workers, vk_rps=args.vk_rps, yd_rps=args.yd_rps,
+                           metrics=metrics)
+        errors = runner.run(args.jobs)
+        if errors:
+            print("\n\t*** ERROR ***")
+            print("\n".join(errors))
+        return
+
+    inter = Interface(vk_token, metrics)
+    if args.users:
+        if not args.yd_token:
+            parser.error("для неинтерактивного режима нужен --yd-token")
+        inter.run_batch(args.users, args.albums, args.yd_token, args.count, size, args.local)
+    else:
+        inter.run()
+
+
 # Запуск с помощью интерфейса
-inter = Interface(vk_token)
-inter.run()
+if __name__ == "__main__":
+    main()
 
 
 